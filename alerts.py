@@ -0,0 +1,149 @@
+# alerts.py
+# Chronic absenteeism alerts from per-student rolling counters.
+#
+# Each student has a bitmask of the last WINDOW_DAYS closed school days
+# (bit 0 = most recent) plus a present-today flag. A tap only sets the flag;
+# closing a day shifts every student's mask by one in a single UPDATE. The
+# flagged list therefore reads one row per student, never the attendance
+# history. A day is closed by the first tap of the next school day or by an
+# explicit close_day() at end of day.
+
+WINDOW_DAYS = 20          # at most 62 so the mask fits in a SQLite integer
+MIN_ATTENDANCE = 0.8      # flag students present on fewer than 80% of days
+MIN_WINDOW_DAYS = 5       # don't flag before this many school days are counted
+
+
+def _get_state(conn):
+    return dict(conn.execute("SELECT key, value FROM attendance_alert_state").fetchall())
+
+
+def _set_state(conn, key, value):
+    conn.execute("""
+        INSERT INTO attendance_alert_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, value))
+
+
+def close_day(conn):
+    state = _get_state(conn)
+    open_date = state.get("open_date")
+    if not open_date:
+        return None
+
+    mask = (1 << WINDOW_DAYS) - 1
+    conn.execute("""
+        DELETE FROM attendance_alert_counters
+        WHERE enrolment_no NOT IN (SELECT enrolment_no FROM students WHERE status='active')
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO attendance_alert_counters (enrolment_no)
+        SELECT enrolment_no FROM students WHERE status='active'
+    """)
+    conn.execute("""
+        UPDATE attendance_alert_counters SET
+            present_days = present_days + present_today - ((window_bits >> ?) & 1),
+            window_bits = ((window_bits << 1) | present_today) & ?,
+            window_days = MIN(window_days + 1, ?),
+            present_today = 0
+    """, (WINDOW_DAYS - 1, mask, WINDOW_DAYS))
+
+    _set_state(conn, "last_closed", open_date)
+    _set_state(conn, "open_date", "")
+    return open_date
+
+
+def on_attendance(conn, enrolment_no, date):
+    state = _get_state(conn)
+    if state.get("window_days") != str(WINDOW_DAYS):
+        rebuild(conn)
+        state = _get_state(conn)
+
+    last_closed = state.get("last_closed") or ""
+    open_date = state.get("open_date") or ""
+
+    if last_closed and date <= last_closed:
+        # Late tap for the day that was just closed: set its bit if still unset
+        if date == last_closed:
+            conn.execute("""
+                UPDATE attendance_alert_counters SET
+                    present_days = present_days + 1 - (window_bits & 1),
+                    window_bits = window_bits | 1
+                WHERE enrolment_no=?
+            """, (enrolment_no,))
+        return
+
+    if open_date and date > open_date:
+        close_day(conn)
+    if date != open_date:
+        _set_state(conn, "open_date", date)
+
+    conn.execute("""
+        INSERT INTO attendance_alert_counters (enrolment_no, present_today) VALUES (?, 1)
+        ON CONFLICT(enrolment_no) DO UPDATE SET present_today = 1
+    """, (enrolment_no,))
+
+
+def rebuild(conn):
+    # Full replay of the last WINDOW_DAYS school days; only needed on first use
+    # or after WINDOW_DAYS changes.
+    open_date = conn.execute(
+        "SELECT MAX(date) FROM attendance WHERE role='student'").fetchone()[0] or ""
+    days = [r[0] for r in conn.execute("""
+        SELECT DISTINCT date FROM attendance
+        WHERE role='student' AND date < ?
+        ORDER BY date DESC LIMIT ?
+    """, (open_date, WINDOW_DAYS))]
+    age = {day: i for i, day in enumerate(days)}
+
+    counters = {r[0]: [0, 0, 0] for r in conn.execute(
+        "SELECT enrolment_no FROM students WHERE status='active'")}
+    if days:
+        rows = conn.execute("""
+            SELECT DISTINCT enrolment_no, date FROM attendance
+            WHERE role='student' AND date BETWEEN ? AND ?
+        """, (days[-1], open_date))
+        for enrolment_no, date in rows:
+            if enrolment_no not in counters:
+                continue
+            if date == open_date:
+                counters[enrolment_no][2] = 1
+            else:
+                counters[enrolment_no][0] |= 1 << age[date]
+                counters[enrolment_no][1] += 1
+
+    conn.execute("DELETE FROM attendance_alert_counters")
+    conn.executemany("""
+        INSERT INTO attendance_alert_counters
+        (enrolment_no, window_bits, present_days, window_days, present_today)
+        VALUES (?, ?, ?, ?, ?)
+    """, ((enrolment_no, bits, present, len(days), today)
+          for enrolment_no, (bits, present, today) in counters.items()))
+
+    _set_state(conn, "window_days", str(WINDOW_DAYS))
+    _set_state(conn, "open_date", open_date)
+    _set_state(conn, "last_closed", days[0] if days else "")
+
+
+def window_stale(conn):
+    # True when WINDOW_DAYS has changed since the counters were built; read-only
+    return _get_state(conn).get("window_days") != str(WINDOW_DAYS)
+
+
+def ensure_window(conn):
+    # Rebuilds the counters when WINDOW_DAYS has changed; the caller commits
+    if window_stale(conn):
+        rebuild(conn)
+
+
+def flagged_students(conn, min_attendance=MIN_ATTENDANCE, min_days=MIN_WINDOW_DAYS):
+    # Read-only; run ensure_window first so the counters match WINDOW_DAYS
+    return conn.execute("""
+        SELECT s.enrolment_no, s.name, s.student_class,
+               c.present_days, c.window_days,
+               ROUND(100.0 * c.present_days / c.window_days, 1) AS attendance_pct
+        FROM attendance_alert_counters c
+        JOIN students s ON s.enrolment_no = c.enrolment_no
+        WHERE s.status='active' AND c.window_days >= ?
+          AND c.present_days < ? * c.window_days
+        ORDER BY attendance_pct, s.student_class, s.name
+    """, (min_days, min_attendance)).fetchall()
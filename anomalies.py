@@ -0,0 +1,96 @@
+# anomalies.py
+# Online detector for suspicious attendance taps, called from the attendance
+# write path. Each card keeps a small deque of its latest taps in memory, so
+# every check is O(1) and never reads attendance history. Flagged taps are
+# logged to the anomalies table for review on the admin Anomalies page.
+#
+# Rules:
+#   odd_hour  - tap outside EARLIEST..LATEST
+#   gate_hop  - a different gate within GATE_HOP_SECONDS of the previous tap
+#   burst     - more than BURST_TAPS taps within BURST_SECONDS
+#
+# Windows are per process: the gate service and the app each see their own
+# taps, which is where proxies show up (a gate lane or the marking page).
+
+import threading
+from collections import deque
+from datetime import datetime
+
+EARLIEST = "05:00:00"
+LATEST = "20:00:00"
+GATE_HOP_SECONDS = 60
+BURST_TAPS = 4
+BURST_SECONDS = 300
+
+KINDS = ["odd_hour", "gate_hop", "burst"]
+
+_windows = {}             # enrolment_no: deque of (timestamp, gate, flags)
+_lock = threading.Lock()
+
+
+def _detect(enrolment_no, date, time, gate):
+    # Updates the card's window and returns [(kind, detail)]
+    flags = []
+    if not EARLIEST <= time < LATEST:
+        flags.append(("odd_hour", f"tap at {time}, outside {EARLIEST[:5]}-{LATEST[:5]}"))
+
+    stamp = datetime.fromisoformat(f"{date} {time}").timestamp()
+    with _lock:
+        window = _windows.get(enrolment_no)
+        if window is None:
+            window = _windows[enrolment_no] = deque(maxlen=BURST_TAPS)
+
+        for seen_stamp, seen_gate, seen_flags in window:
+            if (seen_stamp, seen_gate) == (stamp, gate):
+                # Replayed after a rolled-back transaction (gate batch or write
+                # queue retry): the window already has it, but the logged rows
+                # were rolled back, so return what was found the first time
+                return list(seen_flags)
+        if window:
+            last_stamp, last_gate, _ = window[-1]
+            gap = abs(stamp - last_stamp)
+            if gate and last_gate and gate != last_gate and gap < GATE_HOP_SECONDS:
+                flags.append(("gate_hop", f"{last_gate} then {gate} {gap:.0f}s apart"))
+        if len(window) == BURST_TAPS and stamp - window[0][0] < BURST_SECONDS:
+            flags.append(("burst", f"{BURST_TAPS + 1} taps in {stamp - window[0][0]:.0f}s"))
+        window.append((stamp, gate, tuple(flags)))
+    return flags
+
+
+def check_tap(conn, enrolment_no, role, date, time, gate=None, attendance_id=None):
+    # Logs any anomalies for this tap in the caller's transaction; returns their kinds.
+    # attendance_id is None for taps the gate debounced instead of recording.
+    flags = _detect(enrolment_no, date, time, gate)
+    if flags:
+        conn.executemany("""
+            INSERT INTO anomalies (enrolment_no, role, date, time, gate, kind, detail, attendance_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(enrolment_no, role, date, time, gate, kind, detail, attendance_id) for kind, detail in flags])
+    return [kind for kind, _ in flags]
+
+
+def reset():
+    with _lock:
+        _windows.clear()
+
+
+def list_anomalies(conn, start, end, kind=None, unreviewed_only=False):
+    query = """
+        SELECT a.id, a.date, a.time, a.enrolment_no, a.role,
+               COALESCE(s.name, t.name), a.gate, a.kind, a.detail, a.reviewed
+        FROM anomalies a
+        LEFT JOIN students s ON a.role = 'student' AND s.enrolment_no = a.enrolment_no
+        LEFT JOIN teacher_details t ON a.role = 'teacher' AND t.enrolment_id = a.enrolment_no
+        WHERE a.date BETWEEN ? AND ?
+    """
+    params = [start, end]
+    if kind:
+        query += " AND a.kind = ?"
+        params.append(kind)
+    if unreviewed_only:
+        query += " AND a.reviewed = 0"
+    return conn.execute(query + " ORDER BY a.date DESC, a.time DESC", params).fetchall()
+
+
+def set_reviewed(conn, ids, reviewed=True):
+    conn.executemany("UPDATE anomalies SET reviewed=? WHERE id=?", [(int(reviewed), i) for i in ids])
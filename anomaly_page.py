@@ -0,0 +1,51 @@
+# anomaly_page.py
+
+import sqlite3
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import anomalies
+from write_queue import write
+
+DB = "school.db"
+COLUMNS = ["id", "Date", "Time", "Enrolment", "Role", "Name", "Gate", "Kind", "Detail", "Reviewed"]
+
+
+def anomaly_page():
+    st.title("🚨 Attendance Anomalies")
+    st.caption(f"Taps outside {anomalies.EARLIEST[:5]}-{anomalies.LATEST[:5]}, the same card at two gates within "
+               f"{anomalies.GATE_HOP_SECONDS}s, or more than {anomalies.BURST_TAPS} taps in "
+               f"{anomalies.BURST_SECONDS // 60} minutes.")
+
+    col1, col2, col3 = st.columns(3)
+    days = col1.date_input("Dates", value=(date.today() - timedelta(days=7), date.today()))
+    kind = col2.selectbox("Kind", ["All"] + anomalies.KINDS)
+    unreviewed_only = col3.checkbox("Unreviewed only", value=True)
+    if len(days) != 2:
+        return
+    start, end = (d.strftime("%Y-%m-%d") for d in days)
+
+    with sqlite3.connect(DB) as conn:
+        rows = anomalies.list_anomalies(conn, start, end, None if kind == "All" else kind, unreviewed_only)
+    if not rows:
+        st.success("No anomalies for these filters.")
+        return
+
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["Reviewed"] = df["Reviewed"].astype(bool)
+    st.metric("Flagged Taps", len(df))
+    edited = st.data_editor(df, hide_index=True, use_container_width=True,
+                            disabled=COLUMNS[:-1], column_config={"id": None})
+
+    changed = edited[edited["Reviewed"] != df["Reviewed"]]
+    if st.button("Save Review", disabled=changed.empty):
+        try:
+            for reviewed, ids in changed.groupby("Reviewed")["id"]:
+                write("review_anomalies", anomalies.set_reviewed, ids.tolist(), reviewed)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        st.success(f"Updated {len(changed)} anomalies")
+        st.rerun()
@@ -5,9 +5,17 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 
+import frames
+import periods
+from attendance_store import find_by_uid, mark_if_active
+from nfc_reader import read_uid
+from read_snapshot import read_connect
+from write_queue import write
+
 DB = "school.db"
 
 
+@st.fragment
 def mark_attendance():
     st.subheader("📝 Mark Attendance")
 
@@ -20,28 +28,23 @@ def mark_attendance():
         st.info("Please scan the NFC card...")
         if st.button("Scan NFC"):
             try:
-                import nfc
-                clf = nfc.ContactlessFrontend('usb')
-                tag = clf.connect(rdwr={'on-connect': lambda tag: False})
-                clf.close()
-                uid = str(tag.identifier.hex())
+                uid = read_uid()
                 st.success(f"NFC UID: {uid}")
 
-                table = "students" if role == "student" else "teacher_details"
-                enrol_col = "enrolment_no" if role == "student" else "enrolment_id"
                 with sqlite3.connect(DB) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(f"SELECT {enrol_col} FROM {table} WHERE nfc_uid=? AND status='active'", (uid,))
-                    result = cursor.fetchone()
-                    if result:
-                        enrolment_no = result[0]
-                        st.success(f"Detected Enrolment: {enrolment_no}")
-                    else:
-                        st.error("No active user found with this NFC UID.")
-                        return
+                    result = find_by_uid(conn, uid, role)
+                if not result:
+                    st.error("No active user found with this NFC UID.")
+                    return
+                # Keep the scan across the rerun triggered by "Mark Attendance"
+                st.session_state.nfc_enrolment = result[0]
             except Exception as e:
                 st.error(f"NFC scan failed: {e}")
                 return
+
+        enrolment_no = st.session_state.get("nfc_enrolment", "")
+        if enrolment_no:
+            st.success(f"Detected Enrolment: {enrolment_no}")
     else:
         enrolment_no = st.text_input("Enter Enrolment Number")
 
@@ -53,56 +56,123 @@ def mark_attendance():
         date = datetime.now().strftime("%Y-%m-%d")
         time = datetime.now().strftime("%H:%M:%S")
 
-        with sqlite3.connect(DB) as conn:
-            table = "students" if role == "student" else "teacher_details"
-            cursor = conn.cursor()
-            column = "enrolment_no" if table == "students" else "enrolment_id"
-            cursor.execute(f"SELECT id FROM {table} WHERE {column}=? AND status='active'", (enrolment_no,))
-            result = cursor.fetchone()
-
-            if not result:
-                st.error(f"No active {role} found with enrolment number '{enrolment_no}'.")
-                return
+        try:
+            recorded = write("mark_attendance", mark_if_active, enrolment_no, role, date, time)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
 
-            conn.execute("""
-                INSERT INTO attendance (enrolment_no, role, date, time)
-                VALUES (?, ?, ?, ?)
-            """, (enrolment_no, role, date, time))
-            conn.commit()
+        if not recorded:
+            st.error(f"No active {role} found with enrolment number '{enrolment_no}'.")
+            return
 
-            st.success(f"{role.title()} attendance marked for {enrolment_no} at {time} on {date}")
+        st.session_state.pop("nfc_enrolment", None)
+        st.success(f"{role.title()} attendance marked for {enrolment_no} at {time} on {date}")
 
 
+@st.fragment
 def view_attendance_records():
     st.subheader("📅 View Attendance Records")
 
     role_filter = st.selectbox("Filter by Role", ["All", "student", "teacher"])
     date_filter = st.date_input("Filter by Date (optional)", value=None)
 
-    query = "SELECT * FROM attendance WHERE 1=1"
-    params = []
+    with read_connect(DB) as conn:
+        df = frames.load_attendance(conn, role=None if role_filter == "All" else role_filter,
+                                    date=date_filter.strftime("%Y-%m-%d") if date_filter else None)
 
-    if role_filter != "All":
-        query += " AND role=?"
-        params.append(role_filter)
-
-    if date_filter:
-        query += " AND date=?"
-        params.append(date_filter.strftime("%Y-%m-%d"))
-
-    query += " ORDER BY date DESC, time DESC"
+    st.dataframe(df, use_container_width=True)
 
-    df = pd.read_sql_query(query, sqlite3.connect(DB), params=params)
+@st.fragment
+def period_attendance():
+    st.subheader("🕘 Period Attendance")
+
+    with sqlite3.connect(DB) as conn:
+        classes = [r[0] for r in conn.execute(
+            "SELECT DISTINCT student_class FROM students WHERE status='active' ORDER BY student_class")]
+        numbers = [r[0] for r in periods.list_periods(conn)]
+        now_period = periods.current_period(conn)
+    if not classes or not numbers:
+        st.info("No active classes or periods defined.")
+        return
+
+    day = st.date_input("Date", value=datetime.now(), key="period_date")
+    student_class = st.selectbox("Class", classes, key="period_class")
+    period = st.selectbox("Period", numbers, key="period_number",
+                          index=numbers.index(now_period) if now_period in numbers else 0)
+    date = day.strftime("%Y-%m-%d")
+
+    with sqlite3.connect(DB) as conn:
+        slot = periods.timetable_for(conn, student_class, day.weekday()).get(period)
+        session = periods.get_session(conn, date, student_class, period)
+        if session:
+            _, members, flags = session
+        else:
+            members = periods.current_members(conn, student_class)
+            flags = [True] * len(members)
+        names = dict(conn.execute(f"""
+            SELECT enrolment_no, name FROM students
+            WHERE enrolment_no IN ({",".join("?" * len(members))})
+        """, members)) if members else {}
+
+    if slot:
+        st.caption(f"{slot[0]}" + (f" — {slot[1]}" if slot[1] else ""))
+    st.caption("Already taken; saving overwrites it." if session else "Not taken yet; untick absent students.")
+
+    roster = pd.DataFrame({"Enrolment": members, "Name": [names.get(m, "") for m in members], "Present": flags})
+    edited = st.data_editor(roster, disabled=["Enrolment", "Name"], hide_index=True,
+                            use_container_width=True, key=f"period_roster_{date}_{student_class}_{period}")
+
+    if st.button("Save Period Attendance"):
+        present = edited.loc[edited["Present"], "Enrolment"].tolist()
+        try:
+            write("period_attendance", periods.save_session, date, student_class, period, present)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        st.success(f"Saved period {period} for {student_class}: {len(present)}/{len(members)} present")
+
+    if st.session_state.get("role") == "Admin":
+        with st.expander(f"Timetable — {student_class}, {day:%A}"):
+            timetable_editor(student_class, day.weekday(), numbers)
+
+
+def timetable_editor(student_class, weekday, numbers):
+    with sqlite3.connect(DB) as conn:
+        slots = periods.timetable_for(conn, student_class, weekday)
+        teachers = [r[0] for r in conn.execute(
+            "SELECT enrolment_id FROM teacher_details WHERE status='active' ORDER BY enrolment_id")]
+
+    table = pd.DataFrame({
+        "Period": numbers,
+        "Subject": [slots.get(n, ("", None))[0] for n in numbers],
+        "Teacher": [slots.get(n, ("", None))[1] for n in numbers],
+    })
+    edited = st.data_editor(table, disabled=["Period"], hide_index=True, use_container_width=True,
+                            key=f"timetable_{student_class}_{weekday}",
+                            column_config={"Teacher": st.column_config.SelectboxColumn(options=teachers)})
+
+    if st.button("Save Timetable"):
+        rows = [(int(p), s.strip() if isinstance(s, str) else "", t if isinstance(t, str) else None)
+                for p, s, t in edited.itertuples(index=False)]
+        try:
+            write("timetable", periods.set_day, student_class, weekday, rows)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        st.success("Timetable saved. A blank subject frees the period.")
 
-    st.dataframe(df, use_container_width=True)
 
 def attendance_page():
     st.title("📋 Attendance Management")
 
-    tabs = st.tabs(["Mark Attendance", "View Attendance Records"])
+    # Tab bodies are fragments: a widget change reruns only its own tab
+    tabs = st.tabs(["Mark Attendance", "Period Attendance", "View Attendance Records"])
 
     with tabs[0]:
         mark_attendance()
     with tabs[1]:
+        period_attendance()
+    with tabs[2]:
         view_attendance_records()
 
@@ -0,0 +1,260 @@
+# attendance_matrix.py
+
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+DB = "school.db"
+
+
+class AttendanceMatrix:
+    # Student x school-day presence grid. Rows are students in enrolment order,
+    # columns are the sorted dates on which any student tapped in. The grid is
+    # filled from the attendance table and then kept current by reading only
+    # rows with an id above the last one seen.
+
+    def __init__(self, db=DB):
+        self.db = db
+        self.last_id = 0
+        self.students_version = None
+        self.enrolments = []
+        self.row_of = {}
+        self.pending = {}     # enrolment_no: dates tapped before the student was known
+        self.class_names = []
+        self.class_code = {}
+        self.class_of = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self.days = []
+        self.col_of = {}
+        self._grid = np.zeros((0, 0), dtype=bool)
+        self._lock = threading.Lock()
+
+    @property
+    def present(self):
+        return self._grid[:len(self.enrolments), :len(self.days)]
+
+    # === Building ===
+    def _ensure_capacity(self, rows, cols):
+        cap_rows, cap_cols = self._grid.shape
+        if rows <= cap_rows and cols <= cap_cols:
+            return
+        grid = np.zeros((max(rows, cap_rows * 2, 64), max(cols, cap_cols * 2, 32)), dtype=bool)
+        grid[:cap_rows, :cap_cols] = self._grid
+        self._grid = grid
+
+    def _code_for_class(self, name):
+        if name not in self.class_code:
+            self.class_code[name] = len(self.class_names)
+            self.class_names.append(name)
+        return self.class_code[name]
+
+    def _sync_students(self, conn):
+        version = conn.execute("SELECT version FROM data_versions WHERE name='students'").fetchone()
+        if version is not None and version == self.students_version:
+            return
+        self.students_version = version
+
+        rows = conn.execute("SELECT enrolment_no, student_class, status FROM students ORDER BY id").fetchall()
+        new = [r for r in rows if r[0] not in self.row_of]
+        self._ensure_capacity(len(self.enrolments) + len(new), len(self.days))
+
+        if new:
+            self.class_of = np.concatenate([self.class_of, np.zeros(len(new), dtype=np.int32)])
+            self.active = np.concatenate([self.active, np.zeros(len(new), dtype=bool)])
+            for enrolment_no, _, _ in new:
+                self.row_of[enrolment_no] = len(self.enrolments)
+                self.enrolments.append(enrolment_no)
+                dates = self.pending.pop(enrolment_no, None)
+                if dates:
+                    self._grid[self.row_of[enrolment_no], [self.col_of[day] for day in dates]] = True
+
+        # Class and status can change in place (transfers, drops), so refresh them
+        for enrolment_no, student_class, status in rows:
+            row = self.row_of[enrolment_no]
+            self.class_of[row] = self._code_for_class(student_class or "")
+            self.active[row] = status == "active"
+
+    def _add_days(self, dates):
+        new_days = sorted(set(dates) - self.col_of.keys())
+        if not new_days:
+            return
+
+        if not self.days or new_days[0] > self.days[-1]:
+            self._ensure_capacity(len(self.enrolments), len(self.days) + len(new_days))
+            for day in new_days:
+                self.col_of[day] = len(self.days)
+                self.days.append(day)
+            return
+
+        # Back-dated entries: rebuild the column order once for the whole batch
+        old = self.present.copy()
+        merged = sorted(self.days + new_days)
+        col_of = {day: i for i, day in enumerate(merged)}
+        self._grid = np.zeros((max(len(self.enrolments), 64), max(len(merged) * 2, 32)), dtype=bool)
+        self._grid[:old.shape[0], [col_of[day] for day in self.days]] = old
+        self.days = merged
+        self.col_of = col_of
+
+    def refresh(self):
+        with self._lock, sqlite3.connect(self.db) as conn:
+            # Students and taps from one snapshot, so a student admitted after
+            # the sync can't have taps in the batch
+            conn.execute("BEGIN")
+            self._sync_students(conn)
+            rows = conn.execute("""
+                SELECT id, enrolment_no, date FROM attendance
+                WHERE id > ? AND role='student'
+                ORDER BY id
+            """, (self.last_id,)).fetchall()
+            conn.execute("COMMIT")
+            if not rows:
+                return 0
+
+            self._add_days(r[2] for r in rows)
+            known = []
+            for _, enrolment_no, day in rows:
+                if enrolment_no in self.row_of:
+                    known.append((self.row_of[enrolment_no], self.col_of[day]))
+                else:
+                    # No students row yet: held until _sync_students adds one
+                    self.pending.setdefault(enrolment_no, set()).add(day)
+            if known:
+                row_idx, col_idx = np.array(known, dtype=np.int64).T
+                self._grid[row_idx, col_idx] = True
+            self.last_id = rows[-1][0]
+            return len(rows)
+
+    # === Queries ===
+    def _snapshot(self, start=None, end=None):
+        # Everything a query needs, taken under the lock so a concurrent refresh
+        # can't mix generations. Fancy indexing copies the grid window.
+        with self._lock:
+            lo = bisect_left(self.days, start) if start else 0
+            hi = bisect_right(self.days, end) if end else len(self.days)
+            rows = np.flatnonzero(self.active)
+            return (self.present[rows, lo:hi], rows, self.class_of[rows],
+                    list(self.enrolments), list(self.class_names))
+
+    @staticmethod
+    def _rates(grid):
+        if grid.shape[1] == 0:
+            return np.zeros(grid.shape[0])
+        return 1.0 - grid.sum(axis=1) / grid.shape[1]
+
+    @staticmethod
+    def _streaks(grid):
+        n, d = grid.shape
+        if n == 0 or d == 0:
+            return np.zeros(n, dtype=np.int64)
+
+        # A present-day column after each row keeps runs from crossing rows
+        absent = np.ones((n, d + 1), dtype=np.int8)
+        absent[:, :d] = ~grid
+        absent[:, d] = 0
+        flat = absent.ravel()
+        edges = np.diff(np.concatenate(([0], flat, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        streaks = np.zeros(n, dtype=np.int64)
+        if len(starts):
+            # Runs come out ordered by row, so each row's runs are one contiguous slice
+            run_rows = starts // (d + 1)
+            owners, first = np.unique(run_rows, return_index=True)
+            streaks[owners] = np.maximum.reduceat(ends - starts, first)
+        return streaks
+
+    def absence_rates(self, start=None, end=None):
+        grid, rows, _, _, _ = self._snapshot(start, end)
+        return rows, self._rates(grid)
+
+    def longest_absence_streaks(self, start=None, end=None):
+        grid, rows, _, _, _ = self._snapshot(start, end)
+        return rows, self._streaks(grid)
+
+    def students_absent_over(self, threshold, start=None, end=None):
+        grid, rows, codes, enrolments, class_names = self._snapshot(start, end)
+        rates = self._rates(grid)
+        streaks = self._streaks(grid)
+        hits = np.flatnonzero(rates > threshold)
+        hits = hits[np.argsort(-rates[hits], kind="stable")]
+        return [{
+            "enrolment_no": enrolments[rows[i]],
+            "student_class": class_names[codes[i]],
+            "absence_rate": round(float(rates[i]) * 100, 1),
+            "longest_streak": int(streaks[i]),
+        } for i in hits]
+
+    def class_attendance(self, start=None, end=None):
+        grid, _, codes, _, class_names = self._snapshot(start, end)
+        days = grid.shape[1]
+        size = len(class_names)
+        students = np.bincount(codes, minlength=size)
+        present = np.bincount(codes, weights=grid.sum(axis=1), minlength=size)
+
+        result = []
+        for code in np.flatnonzero(students):
+            possible = students[code] * days
+            result.append({
+                "student_class": class_names[code],
+                "students": int(students[code]),
+                "attendance_pct": round(float(present[code]) / possible * 100, 1) if possible else 0.0,
+            })
+        return sorted(result, key=lambda r: r["student_class"])
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_matrix(db=DB):
+    # One matrix per database for the whole process; each call picks up new taps
+    with _shared_lock:
+        matrix = _shared.get(db)
+        if matrix is None:
+            matrix = _shared[db] = AttendanceMatrix(db)
+    matrix.refresh()
+    return matrix
+
+
+def _benchmark(students=10_000, days=200, presence=0.9):
+    import os
+    import tempfile
+    from datetime import date, timedelta
+
+    from db_setup import init_db
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    init_db(path)
+    rng = np.random.default_rng(0)
+    day_list = [(date(2025, 1, 1) + timedelta(days=i)).isoformat() for i in range(days)]
+
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO students (name, student_class, enrolment_no) VALUES (?, ?, ?)",
+                         ((f"Student {i}", f"Class {i % 100}", f"STU-{i}") for i in range(students)))
+        present = rng.random((students, days)) < presence
+        conn.executemany("INSERT INTO attendance (enrolment_no, role, date, time) VALUES (?, 'student', ?, '08:00:00')",
+                         ((f"STU-{s}", day_list[d]) for d, s in zip(*np.nonzero(present.T))))
+
+    matrix = AttendanceMatrix(path)
+    start = time.perf_counter()
+    matrix.refresh()
+    print(f"initial build       {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    for name, query in [
+        ("absence_rates", lambda: matrix.absence_rates()),
+        ("longest_streaks", lambda: matrix.longest_absence_streaks()),
+        ("absent_over_20pct", lambda: matrix.students_absent_over(0.2)),
+        ("class_attendance", lambda: matrix.class_attendance()),
+        ("incremental_refresh", lambda: matrix.refresh()),
+    ]:
+        start = time.perf_counter()
+        query()
+        print(f"{name:<19} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,58 @@
+# attendance_store.py
+# Streamlit-free write path for attendance so every way of recording a tap
+# (the page, the NFC gate, batch jobs) updates the same derived data.
+
+import alerts
+import anomalies
+
+DB = "school.db"
+
+
+def find_active(conn, role, enrolment_no):
+    table = "students" if role == "student" else "teacher_details"
+    column = "enrolment_no" if role == "student" else "enrolment_id"
+    return conn.execute(f"SELECT id FROM {table} WHERE {column}=? AND status='active'",
+                        (enrolment_no,)).fetchone()
+
+
+def find_by_uid(conn, uid, role=None):
+    # (enrolment, role) of the active person holding the card, or None
+    rows = conn.execute("""
+        SELECT enrolment_no, 'student' FROM students WHERE nfc_uid=? AND status='active'
+        UNION ALL
+        SELECT enrolment_id, 'teacher' FROM teacher_details WHERE nfc_uid=? AND status='active'
+    """, (uid, uid)).fetchall()
+    for row in rows:
+        if role is None or row[1] == role:
+            return row
+    return None
+
+
+def assign_uid(conn, role, enrolment_no, uid):
+    # True when the card was assigned to an active person
+    if not find_active(conn, role, enrolment_no):
+        return False
+    table = "students" if role == "student" else "teacher_details"
+    column = "enrolment_no" if role == "student" else "enrolment_id"
+    conn.execute(f"UPDATE {table} SET nfc_uid=? WHERE {column}=?", (uid, enrolment_no))
+    return True
+
+
+def mark_if_active(conn, enrolment_no, role, date, time, gate=None):
+    # record_attendance for an active person; None when there is no such person
+    if not find_active(conn, role, enrolment_no):
+        return None
+    return record_attendance(conn, enrolment_no, role, date, time, gate)
+
+
+def record_attendance(conn, enrolment_no, role, date, time, gate=None):
+    # Caller owns the transaction and commits
+    cursor = conn.execute("""
+        INSERT INTO attendance (enrolment_no, role, date, time, gate)
+        VALUES (?, ?, ?, ?, ?)
+    """, (enrolment_no, role, date, time, gate))
+
+    anomalies.check_tap(conn, enrolment_no, role, date, time, gate, cursor.lastrowid)
+    if role == "student":
+        alerts.on_attendance(conn, enrolment_no, date)
+    return cursor.lastrowid
@@ -3,6 +3,8 @@
 import sqlite3
 import hashlib
 
+from write_queue import write
+
 DB = "school.db"
 ADMIN_CODE = "3075"
 
@@ -13,17 +15,16 @@ def signup_admin(username, password, code):
     if code != ADMIN_CODE:
         return "Invalid admin code!"
     
-    conn = sqlite3.connect(DB)
-    c = conn.cursor()
     try:
-        c.execute("INSERT INTO admins (username, password) VALUES (?, ?)", 
-                  (username, get_hashed_password(password)))
-        conn.commit()
+        write("signup_admin", _insert_admin, username, get_hashed_password(password))
         return "Signup successful!"
     except sqlite3.IntegrityError:
         return "Username already exists!"
-    finally:
-        conn.close()
+    except sqlite3.OperationalError:
+        return "The database is busy, please try again."
+
+def _insert_admin(conn, username, password_hash):
+    conn.execute("INSERT INTO admins (username, password) VALUES (?, ?)", (username, password_hash))
 
 def login_user(role, username, password):
     conn = sqlite3.connect(DB)
@@ -41,12 +42,13 @@ def change_password(role, username, old_pass, new_pass):
     if not login_user(role, username, old_pass):
         return "Old password incorrect!"
     
-    conn = sqlite3.connect(DB)
-    c = conn.cursor()
-    table = "admins" if role == "Admin" else "teachers"
-    c.execute(f"UPDATE {table} SET password = ? WHERE username = ?", 
-              (get_hashed_password(new_pass), username))
-    conn.commit()
-    conn.close()
+    try:
+        write("change_password", _set_password, role, username, get_hashed_password(new_pass))
+    except sqlite3.OperationalError:
+        return "The database is busy, please try again."
     return "Password changed successfully."
 
+def _set_password(conn, role, username, password_hash):
+    table = "admins" if role == "Admin" else "teachers"
+    conn.execute(f"UPDATE {table} SET password = ? WHERE username = ?", (password_hash, username))
+
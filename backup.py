@@ -0,0 +1,163 @@
+# backup.py
+# Online backups of school.db with the SQLite backup API. The copy is taken
+# a few pages at a time with a pause between steps, inside one read
+# transaction: in WAL mode that pins a snapshot, so the gate keeps writing and
+# the backup never restarts because of those writes. Each backup is checked
+# before it replaces the temporary file, and old backups are rotated out.
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import perf
+from maintenance import logger
+
+DB = "school.db"
+BACKUP_DIR = "backups"
+KEEP = 14                 # newest backups kept by rotation
+STEP_PAGES = 256          # pages copied per step
+STEP_SLEEP = 0.05         # seconds to yield between steps
+
+
+def table_counts(conn):
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def list_backups(directory=BACKUP_DIR):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.startswith("school-") and n.endswith(".db"))
+    return [os.path.join(directory, n) for n in names]
+
+
+def verify(path, expected_counts=None):
+    # Returns a list of problems; empty means the file opens, passes
+    # quick_check and (when given) has the same row counts as the source
+    problems = []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        checks = [r[0] for r in conn.execute("PRAGMA quick_check(20)")]
+        if checks != ["ok"]:
+            problems.extend(checks)
+        if expected_counts is not None:
+            counts = table_counts(conn)
+            for table, expected in expected_counts.items():
+                if counts.get(table) != expected:
+                    problems.append(f"{table}: {counts.get(table)} rows, expected {expected}")
+    except sqlite3.DatabaseError as e:
+        problems.append(str(e))
+    finally:
+        conn.close()
+    return problems
+
+
+def rotate(directory=BACKUP_DIR, keep=KEEP):
+    removed = []
+    for path in list_backups(directory)[:-keep or None]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def copy_database(db, dest, pages=STEP_PAGES, sleep=STEP_SLEEP):
+    # Paged copy of one snapshot of db into dest; returns that snapshot's row counts
+    src = sqlite3.connect(db, timeout=30, isolation_level=None)
+    dst = sqlite3.connect(dest)
+    try:
+        src.execute("BEGIN")
+        counts = table_counts(src)
+        src.backup(dst, pages=pages, progress=lambda status, remaining, total: time.sleep(sleep))
+        src.execute("COMMIT")
+        # The copy inherits WAL mode; a rollback journal means opening it
+        # later leaves no -wal/-shm files beside it
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+        src.close()
+    return counts
+
+
+def backup(db=DB, directory=BACKUP_DIR, pages=STEP_PAGES, sleep=STEP_SLEEP, keep=KEEP):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"school-{datetime.now():%Y%m%d-%H%M%S}.db")
+    tmp_path = path + ".tmp"
+    start = time.perf_counter()
+
+    counts = copy_database(db, tmp_path, pages, sleep)
+    problems = verify(tmp_path, counts)
+    if problems:
+        os.remove(tmp_path)
+        logger.error("backup %s failed verification: %s", path, "; ".join(problems))
+        raise sqlite3.DatabaseError(f"Backup failed verification: {problems[0]}")
+
+    os.replace(tmp_path, path)
+    removed = rotate(directory, keep)
+    elapsed = time.perf_counter() - start
+    perf.record("backup", elapsed)
+    logger.info("backup %s %d bytes %.1fms, rotated out %d", path, os.path.getsize(path),
+                elapsed * 1000, len(removed))
+    return {"path": path, "bytes": os.path.getsize(path), "seconds": round(elapsed, 2),
+            "rows": sum(counts.values()), "removed": removed}
+
+
+def restore(backup_path, db=DB):
+    # Stop the app and gate first: this replaces every page of the live file.
+    # The current database is backed up beside it before being overwritten.
+    problems = verify(backup_path)
+    if problems:
+        raise sqlite3.DatabaseError(f"Refusing to restore {backup_path}: {problems[0]}")
+
+    safety = f"{db}.pre-restore-{datetime.now():%Y%m%d-%H%M%S}"
+    with sqlite3.connect(db) as live, sqlite3.connect(safety) as copy:
+        live.backup(copy)
+
+    src = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(db, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+    conn = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    try:
+        expected = table_counts(conn)
+    finally:
+        conn.close()
+    problems = verify(db, expected)
+    if problems:
+        raise sqlite3.DatabaseError(f"Restored database failed verification: {problems[0]}")
+    logger.info("restored %s from %s (previous copy at %s)", db, backup_path, safety)
+    return safety
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online backups of the school database.")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--dir", default=BACKUP_DIR)
+    parser.add_argument("--keep", type=int, default=KEEP, help="Backups to keep after rotation")
+    parser.add_argument("--pages", type=int, default=STEP_PAGES, help="Pages copied per step")
+    parser.add_argument("--sleep", type=float, default=STEP_SLEEP, help="Seconds between steps")
+    parser.add_argument("--list", action="store_true", help="List existing backups")
+    parser.add_argument("--verify", metavar="BACKUP", help="Check a backup file and exit")
+    parser.add_argument("--restore", metavar="BACKUP", help="Replace the database with this backup")
+    args = parser.parse_args()
+
+    if args.list:
+        for path in list_backups(args.dir):
+            print(f"{path}  {os.path.getsize(path):>12,} bytes")
+    elif args.verify:
+        problems = verify(args.verify)
+        print("ok" if not problems else "\n".join(problems))
+        raise SystemExit(1 if problems else 0)
+    elif args.restore:
+        safety = restore(args.restore, args.db)
+        print(f"Restored {args.db} from {args.restore}; previous database saved as {safety}")
+    else:
+        result = backup(args.db, args.dir, args.pages, args.sleep, args.keep)
+        print(f"{result['path']}  {result['bytes']:,} bytes, {result['rows']:,} rows, "
+              f"{result['seconds']}s, rotated out {len(result['removed'])}")
@@ -0,0 +1,51 @@
+# class_roll.py
+# Per-class daily roll: expected (active students), present, absent and late.
+
+LATE_AFTER = "08:00:00"   # first tap after this time counts as late
+
+
+def daily_roll(conn, date, late_after=LATE_AFTER):
+    return conn.execute("""
+        WITH present AS (
+            SELECT enrolment_no, MIN(time) AS first_in
+            FROM attendance
+            WHERE role='student' AND date=?
+            GROUP BY enrolment_no
+        )
+        SELECT s.student_class,
+               COUNT(*) AS expected,
+               COUNT(p.enrolment_no) AS present,
+               COUNT(*) - COUNT(p.enrolment_no) AS absent,
+               COALESCE(SUM(p.first_in > ?), 0) AS late
+        FROM students s
+        LEFT JOIN present p ON p.enrolment_no = s.enrolment_no
+        WHERE s.status='active'
+        GROUP BY s.student_class
+        ORDER BY s.student_class
+    """, (date, late_after)).fetchall()
+
+
+def absentees(conn, date, student_class):
+    # Active roster of the class minus everyone who tapped in that day
+    return conn.execute("""
+        SELECT s.enrolment_no, s.name, s.father_name, s.contact
+        FROM students s
+        WHERE s.status='active' AND s.student_class=?
+          AND NOT EXISTS (
+              SELECT 1 FROM attendance a
+              WHERE a.enrolment_no = s.enrolment_no AND a.role='student' AND a.date=?
+          )
+        ORDER BY s.name
+    """, (student_class, date)).fetchall()
+
+
+def late_arrivals(conn, date, student_class, late_after=LATE_AFTER):
+    return conn.execute("""
+        SELECT s.enrolment_no, s.name, MIN(a.time) AS first_in
+        FROM students s
+        JOIN attendance a ON a.enrolment_no = s.enrolment_no AND a.role='student' AND a.date=?
+        WHERE s.status='active' AND s.student_class=?
+        GROUP BY s.enrolment_no, s.name
+        HAVING MIN(a.time) > ?
+        ORDER BY first_in
+    """, (date, student_class, late_after)).fetchall()
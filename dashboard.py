@@ -4,12 +4,20 @@ import sqlite3
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import alerts
+import class_roll
+import reports
+import trends
+from attendance_matrix import get_matrix
+from read_snapshot import as_of, read_connect
+from write_queue import write
 
 DB = "school.db"
 
 def fetch_count(query, params=()):
-    with sqlite3.connect(DB) as conn:
+    with read_connect(DB) as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
         result = cursor.fetchone()
@@ -17,11 +25,115 @@ def fetch_count(query, params=()):
 
 
 def fetch_dataframe(query, params=()):
-    with sqlite3.connect(DB) as conn:
+    with read_connect(DB) as conn:
         return pd.read_sql_query(query, conn, params=params)
 
+def absence_analytics():
+    st.subheader("🚸 Absence Analytics")
+    matrix = get_matrix(DB)
+
+    if not matrix.days:
+        st.info("No student attendance recorded yet.")
+        return
+
+    first_day = datetime.strptime(matrix.days[0], "%Y-%m-%d").date()
+    last_day = datetime.strptime(matrix.days[-1], "%Y-%m-%d").date()
+    col1, col2 = st.columns(2)
+    with col1:
+        period = st.date_input("School days between", value=(first_day, last_day))
+    with col2:
+        threshold = st.slider("Flag students absent more than (%)", 0, 100, 20)
+
+    start = period[0].strftime("%Y-%m-%d") if len(period) > 0 else None
+    end = period[1].strftime("%Y-%m-%d") if len(period) > 1 else None
+
+    absentees = matrix.students_absent_over(threshold / 100, start, end)
+    st.caption(f"{len(absentees)} students absent on more than {threshold}% of school days")
+    st.dataframe(pd.DataFrame(absentees), use_container_width=True)
+
+    st.markdown("**Attendance by Class**")
+    st.dataframe(pd.DataFrame(matrix.class_attendance(start, end)), use_container_width=True)
+
+
+@st.cache_data(ttl=300)
+def load_trend(granularity, start, end, roles):
+    with read_connect(DB) as conn:
+        rows = trends.attendance_trend(conn, granularity, start, end, roles)
+    return pd.DataFrame(rows, columns=["period", "role", "present", "school_days"])
+
+
+def class_roll_section(today):
+    st.subheader("🏫 Class Roll")
+    roll_date = st.date_input("Roll Date", value=datetime.strptime(today, "%Y-%m-%d").date())
+    roll_day = roll_date.strftime("%Y-%m-%d")
+
+    with read_connect(DB) as conn:
+        # Past days come from reports.py when it has precomputed them
+        roll, generated_at = reports.load(conn, "daily", roll_day) if roll_day < today else (None, None)
+        if roll is None:
+            roll = class_roll.daily_roll(conn, roll_day)
+        else:
+            roll = [row[1:] for row in roll]
+            st.caption(f"Precomputed report from {generated_at}")
+
+    if not roll:
+        st.info("No active students.")
+        return
+
+    roll_df = pd.DataFrame(roll, columns=["student_class", "expected", "present", "absent", "late"])
+    st.dataframe(roll_df, use_container_width=True)
+
+    selected = st.selectbox("Show absentees for class", roll_df["student_class"])
+    with read_connect(DB) as conn:
+        missing = class_roll.absentees(conn, roll_day, selected)
+        late = class_roll.late_arrivals(conn, roll_day, selected)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"**Absent ({len(missing)})**")
+        st.dataframe(pd.DataFrame(missing, columns=["enrolment_no", "name", "father_name", "contact"]),
+                     use_container_width=True)
+    with col2:
+        st.markdown(f"**Late after {class_roll.LATE_AFTER} ({len(late)})**")
+        st.dataframe(pd.DataFrame(late, columns=["enrolment_no", "name", "first_in"]),
+                     use_container_width=True)
+
+
+def chronic_absence_alerts():
+    st.subheader("⚠️ Chronic Absence Alerts")
+    st.caption(f"Students present on fewer than {int(alerts.MIN_ATTENDANCE * 100)}% "
+               f"of the last {alerts.WINDOW_DAYS} school days")
+
+    try:
+        if st.session_state.role == "Admin" and st.button("Close Attendance Day"):
+            closed = write("close_day", alerts.close_day)
+            if closed:
+                st.success(f"Attendance day {closed} closed.")
+            else:
+                st.info("No open attendance day to close.")
+        with sqlite3.connect(DB) as conn:
+            stale = alerts.window_stale(conn)
+        if stale:
+            write("alerts_window", alerts.ensure_window)
+    except sqlite3.OperationalError:
+        st.error("The database is busy, please try again.")
+
+    with sqlite3.connect(DB) as conn:
+        flagged = alerts.flagged_students(conn)
+
+    if not flagged:
+        st.success("No students currently flagged.")
+    else:
+        st.dataframe(pd.DataFrame(flagged, columns=["enrolment_no", "name", "student_class", "present_days",
+                                                    "school_days", "attendance_pct"]),
+                     use_container_width=True)
+
+
 def dashboard():
     st.title("📊 Dashboard")
+    snapshot_time = as_of()
+    if snapshot_time:
+        st.caption(f"Figures as of {datetime.fromtimestamp(snapshot_time):%H:%M:%S} (read snapshot)")
 
     # === KPIs ===
     col1, col2, col3, col4 = st.columns(4)
@@ -50,20 +162,38 @@ def dashboard():
 
     # === Attendance Trends ===
     st.subheader("📈 Attendance Trends Over Time")
-    role_filter = st.selectbox("Select Role", ["student", "teacher", "both"])
-
-    if role_filter == "both":
-        query = "SELECT date, role, COUNT(DISTINCT enrolment_no) as present FROM attendance GROUP BY date, role"
-    else:
-        query = "SELECT date, role, COUNT(DISTINCT enrolment_no) as present FROM attendance WHERE role=? GROUP BY date"
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        role_filter = st.selectbox("Select Role", ["student", "teacher", "both"])
+    with col2:
+        granularity = st.selectbox("Granularity", trends.GRANULARITIES)
+    with col3:
+        default_start = datetime.now().date() - timedelta(days=90)
+        period = st.date_input("Date Range", value=(default_start, datetime.now().date()))
+
+    if len(period) == 2:
+        start, end = period
+        bucket = trends.fit_granularity(granularity, start, end)
+        if bucket != granularity:
+            st.caption(f"Showing {bucket}ly points to stay under {trends.MAX_POINTS} points.")
+
+        roles = ("student", "teacher") if role_filter == "both" else (role_filter,)
+        df = load_trend(bucket, start, end, roles)
+
+        if df.empty:
+            st.info("No attendance data available to show trends.")
+        else:
+            fig = px.line(df, x="period", y="present", color="role", markers=True,
+                          hover_data=["school_days"],
+                          labels={"present": "Avg. Present per Day", "period": bucket.title()},
+                          title="Attendance Over Time")
+            st.plotly_chart(fig, use_container_width=True)
 
-    df = fetch_dataframe(query, (role_filter,) if role_filter != "both" else ())
+    st.markdown("---")
+    class_roll_section(today)
 
-    if df.empty:
-        st.info("No attendance data available to show trends.")
-    else:
-        fig = px.line(df, x="date", y="present", color="role", markers=True,
-                      labels={"present": "Present Count", "date": "Date"},
-                      title="Attendance Over Time")
-        st.plotly_chart(fig, use_container_width=True)
+    st.markdown("---")
+    chronic_absence_alerts()
 
+    st.markdown("---")
+    absence_analytics()
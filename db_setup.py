@@ -2,10 +2,21 @@
 
 import sqlite3
 
-def init_db():
-    conn = sqlite3.connect("school.db")
+import dedupe
+import periods
+
+def add_column_if_missing(c, table, column, decl):
+    columns = [row[1] for row in c.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def init_db(path="school.db"):
+    conn = sqlite3.connect(path)
     c = conn.cursor()
 
+    # Only takes effect on a new database; see maintenance.py for existing ones
+    c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
     # Admins table
     c.execute('''CREATE TABLE IF NOT EXISTS admins (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,6 +81,321 @@ def init_db():
         FOREIGN KEY(test_id) REFERENCES tests(id)
     )''')
 
+    # WAL lets the gate writer and page readers work at the same time
+    c.execute("PRAGMA journal_mode=WAL")
+
+    # NFC cards and the gate lane each tap came from
+    add_column_if_missing(c, "students", "nfc_uid", "TEXT")
+    add_column_if_missing(c, "teacher_details", "nfc_uid", "TEXT")
+    add_column_if_missing(c, "attendance", "gate", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_students_nfc_uid ON students (nfc_uid)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_teacher_details_nfc_uid ON teacher_details (nfc_uid)")
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_role_date ON attendance (role, date, enrolment_no)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_students_status_class ON students (status, student_class, enrolment_no)")
+
+    # School terms (see terms.py for the default when none are defined)
+    c.execute('''CREATE TABLE IF NOT EXISTS terms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        start_date TEXT,
+        end_date TEXT
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_terms_dates ON terms (start_date, end_date)")
+
+    # Rolling attendance counters for chronic absence alerts (see alerts.py)
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance_alert_counters (
+        enrolment_no TEXT PRIMARY KEY,
+        window_bits INTEGER NOT NULL DEFAULT 0,
+        present_days INTEGER NOT NULL DEFAULT 0,
+        window_days INTEGER NOT NULL DEFAULT 0,
+        present_today INTEGER NOT NULL DEFAULT 0
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance_alert_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+
+    # Change counters so caches can tell when a table was written to
+    c.execute('''CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )''')
+
+    for table in ("students", "teacher_details", "attendance", "tests", "test_records"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO data_versions (name, version) VALUES ('{table}', 1)
+                    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+                END''')
+
+    # Incremental exports: test_records.change_seq is stamped whenever a record
+    # or its test is edited, so changed rows can be found without a full scan
+    c.execute('''CREATE TABLE IF NOT EXISTS export_watermarks (
+        consumer TEXT,
+        dataset TEXT,
+        last_id INTEGER DEFAULT 0,
+        last_change INTEGER DEFAULT 0,
+        exported_at TEXT,
+        PRIMARY KEY (consumer, dataset)
+    )''')
+    add_column_if_missing(c, "test_records", "change_seq", "INTEGER DEFAULT 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_test_records_change_seq ON test_records (change_seq)")
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS test_records_change_seq
+        AFTER UPDATE OF test_id, student_enrolment, obtained_marks ON test_records
+        BEGIN
+            INSERT INTO data_versions (name, version) VALUES ('test_records_change_seq', 1)
+            ON CONFLICT(name) DO UPDATE SET version = version + 1;
+            UPDATE test_records
+            SET change_seq = (SELECT version FROM data_versions WHERE name='test_records_change_seq')
+            WHERE id = NEW.id;
+        END''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS tests_change_seq
+        AFTER UPDATE OF test_name, test_date, full_marks ON tests
+        BEGIN
+            INSERT INTO data_versions (name, version) VALUES ('test_records_change_seq', 1)
+            ON CONFLICT(name) DO UPDATE SET version = version + 1;
+            UPDATE test_records
+            SET change_seq = (SELECT version FROM data_versions WHERE name='test_records_change_seq')
+            WHERE test_id = NEW.id;
+        END''')
+
+    # Materialized rankings (see rankings.py)
+    add_column_if_missing(c, "tests", "records_version", "INTEGER DEFAULT 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_test_records_test ON test_records (test_id, student_enrolment)")
+
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS test_records_ranks_{event.lower()}
+            AFTER {event} ON test_records
+            BEGIN
+                UPDATE tests SET records_version = records_version + 1 WHERE id = {row}.test_id;
+            END''')
+    # A record moved to another test makes the old test stale too
+    c.execute('''CREATE TRIGGER IF NOT EXISTS test_records_ranks_move
+        AFTER UPDATE OF test_id ON test_records
+        WHEN OLD.test_id IS NOT NEW.test_id
+        BEGIN
+            UPDATE tests SET records_version = records_version + 1 WHERE id = OLD.test_id;
+        END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS tests_ranks_full_marks
+        AFTER UPDATE OF full_marks ON tests
+        BEGIN
+            UPDATE tests SET records_version = records_version + 1 WHERE id = NEW.id;
+        END''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS test_ranks (
+        test_id INTEGER,
+        student_enrolment TEXT,
+        student_class TEXT,
+        obtained_marks INTEGER,
+        percentage REAL,
+        class_rank INTEGER,
+        school_rank INTEGER,
+        PRIMARY KEY (test_id, student_enrolment)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_test_ranks_class ON test_ranks (test_id, student_class, class_rank)")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS ranked_tests (
+        test_id INTEGER PRIMARY KEY,
+        version INTEGER
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS term_ranks (
+        term_start TEXT,
+        student_enrolment TEXT,
+        student_class TEXT,
+        tests_taken INTEGER,
+        average_pct REAL,
+        class_rank INTEGER,
+        school_rank INTEGER,
+        PRIMARY KEY (term_start, student_enrolment)
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS ranked_terms (
+        term_start TEXT PRIMARY KEY,
+        signature TEXT
+    )''')
+
+    # Per-student change counters for the profile cache (see student_profile.py)
+    c.execute('''CREATE TABLE IF NOT EXISTS student_versions (
+        enrolment_no TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_enrolment ON attendance (enrolment_no, date, time)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_test_records_student ON test_records (student_enrolment)")
+
+    bump = '''INSERT INTO student_versions (enrolment_no, version) VALUES ({0}, 1)
+               ON CONFLICT(enrolment_no) DO UPDATE SET version = version + 1;'''
+    student_triggers = {
+        "attendance_insert": ("AFTER INSERT ON attendance WHEN NEW.role = 'student'",
+                              [bump.format("NEW.enrolment_no")]),
+        "attendance_delete": ("AFTER DELETE ON attendance WHEN OLD.role = 'student'",
+                              [bump.format("OLD.enrolment_no")]),
+        "test_records_insert": ("AFTER INSERT ON test_records", [bump.format("NEW.student_enrolment")]),
+        "test_records_update": ("AFTER UPDATE ON test_records",
+                                [bump.format("OLD.student_enrolment"), bump.format("NEW.student_enrolment")]),
+        "test_records_delete": ("AFTER DELETE ON test_records", [bump.format("OLD.student_enrolment")]),
+        "students_update": ("AFTER UPDATE ON students",
+                            [bump.format("OLD.enrolment_no"), bump.format("NEW.enrolment_no")]),
+    }
+    for name, (event, statements) in student_triggers.items():
+        body = "\n".join(statements)
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS student_version_{name} {event} BEGIN {body} END")
+
+    # Test edits change every profile that lists the test
+    c.execute('''CREATE TRIGGER IF NOT EXISTS student_version_tests_update
+        AFTER UPDATE OF test_name, test_date, full_marks ON tests
+        BEGIN
+            INSERT INTO student_versions (enrolment_no, version)
+            SELECT DISTINCT student_enrolment, 1 FROM test_records WHERE test_id = NEW.id
+            ON CONFLICT(enrolment_no) DO UPDATE SET version = version + 1;
+        END''')
+
+    # Blocking keys for duplicate-person detection (see dedupe.py)
+    for table in ("students", "teacher_details"):
+        for column in ("id_card_key", "contact_key", "name_key"):
+            add_column_if_missing(c, table, column, "TEXT")
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+    dedupe.backfill_keys(conn)
+
+    # Precomputed reports written by reports.py
+    c.execute('''CREATE TABLE IF NOT EXISTS report_runs (
+        report TEXT,
+        period TEXT,
+        source_version TEXT,
+        generated_at TEXT,
+        PRIMARY KEY (report, period)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS report_daily_attendance (
+        date TEXT,
+        student_class TEXT,
+        expected INTEGER,
+        present INTEGER,
+        absent INTEGER,
+        late INTEGER,
+        PRIMARY KEY (date, student_class)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS report_monthly_attendance (
+        month TEXT,
+        student_class TEXT,
+        students INTEGER,
+        school_days INTEGER,
+        present_days INTEGER,
+        attendance_pct REAL,
+        PRIMARY KEY (month, student_class)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS report_term_tests (
+        term_start TEXT,
+        test_id INTEGER,
+        test_name TEXT,
+        test_date TEXT,
+        student_class TEXT,
+        students INTEGER,
+        average_pct REAL,
+        highest_pct REAL,
+        lowest_pct REAL,
+        pass_pct REAL,
+        PRIMARY KEY (term_start, test_id, student_class)
+    )''')
+
+    # Teacher working hours materialized by workhours.py
+    c.execute('''CREATE TABLE IF NOT EXISTS workhours_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS teacher_daily_hours (
+        enrolment_no TEXT,
+        date TEXT,
+        first_in TEXT,
+        last_out TEXT,
+        taps INTEGER,
+        hours REAL,
+        late INTEGER,
+        PRIMARY KEY (enrolment_no, date)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS teacher_monthly_hours (
+        month TEXT,
+        enrolment_no TEXT,
+        days_worked INTEGER,
+        total_hours REAL,
+        late_days INTEGER,
+        incomplete_days INTEGER,
+        PRIMARY KEY (month, enrolment_no)
+    )''')
+
+    # Period-level attendance (see periods.py): one row per class-period with
+    # a bitmap over a shared roster instead of one row per student
+    c.execute('''CREATE TABLE IF NOT EXISTS periods (
+        number INTEGER PRIMARY KEY,
+        start_time TEXT,
+        end_time TEXT
+    )''')
+    if not c.execute("SELECT 1 FROM periods LIMIT 1").fetchone():
+        c.executemany("INSERT INTO periods (number, start_time, end_time) VALUES (?, ?, ?)", periods.DEFAULT_PERIODS)
+    c.execute('''CREATE TABLE IF NOT EXISTS timetable (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_class TEXT,
+        weekday INTEGER,
+        period INTEGER,
+        subject TEXT,
+        teacher_enrolment TEXT,
+        UNIQUE (student_class, weekday, period)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS class_rosters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_class TEXT,
+        signature TEXT UNIQUE,
+        members TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS period_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        student_class TEXT,
+        period INTEGER,
+        roster_id INTEGER REFERENCES class_rosters(id),
+        roster_size INTEGER,
+        present BLOB,
+        present_count INTEGER,
+        UNIQUE (date, student_class, period)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_period_sessions_roster ON period_sessions (roster_id, date)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS period_sessions_version_{event.lower()}
+            AFTER {event} ON period_sessions
+            BEGIN
+                INSERT INTO data_versions (name, version) VALUES ('period_sessions', 1)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1;
+            END''')
+    c.execute('''CREATE TABLE IF NOT EXISTS report_period_attendance (
+        date TEXT,
+        student_class TEXT,
+        periods_held INTEGER,
+        possible INTEGER,
+        present INTEGER,
+        attendance_pct REAL,
+        PRIMARY KEY (date, student_class)
+    )''')
+
+    # Suspicious taps flagged by anomalies.py
+    c.execute('''CREATE TABLE IF NOT EXISTS anomalies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        enrolment_no TEXT,
+        role TEXT,
+        date TEXT,
+        time TEXT,
+        gate TEXT,
+        kind TEXT,
+        detail TEXT,
+        attendance_id INTEGER,
+        reviewed INTEGER NOT NULL DEFAULT 0
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_anomalies_date ON anomalies (date, time)")
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,145 @@
+# dedupe.py
+# Duplicate-person detection for student and teacher intake. Each row stores
+# three blocking keys in indexed columns: the normalized ID card number, the
+# last ten digits of the contact number and a phonetic key of the name. A new
+# record is compared only against rows sharing at least one key, and those
+# candidates are scored with fuzzy string matching.
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+MATCH_THRESHOLD = 0.7     # candidates scoring below this are not reported
+
+PEOPLE = {
+    # role: (table, enrolment column)
+    "student": ("students", "enrolment_no"),
+    "teacher": ("teacher_details", "enrolment_id"),
+}
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in letters}
+
+
+def normalize_name(name):
+    # Lowercased words of letters in any script. Accents on Latin letters are
+    # dropped (José -> jose); marks in other scripts (Devanagari vowel signs)
+    # are part of the word and kept.
+    chars = []
+    for c in unicodedata.normalize("NFKD", name or ""):
+        if unicodedata.combining(c) and chars and chars[-1].isascii():
+            continue
+        chars.append(c if c.isalpha() or unicodedata.category(c).startswith("M") else " ")
+    return " ".join("".join(chars).casefold().split())
+
+
+def soundex(word):
+    if not word:
+        return ""
+    codes = [_SOUNDEX_CODES.get(c, "") for c in word]
+    key, last = word[0].upper(), codes[0]
+    for c, code in zip(word[1:], codes[1:]):
+        if code not in ("0", last) and code:
+            key += code
+        if c not in "hw":
+            last = code
+    return (key + "000")[:4]
+
+
+def _word_key(word):
+    # Soundex for Latin words; other scripts use their first four letters
+    if word.isascii():
+        return soundex(word)
+    return "".join(c for c in word if c.isalpha())[:4]
+
+
+def name_key(name):
+    # Key of the first and last name, so spelling variants share a block
+    parts = normalize_name(name).split()
+    if not parts:
+        return None
+    return _word_key(parts[0]) + (_word_key(parts[-1]) if len(parts) > 1 else "")
+
+
+def id_card_key(id_card):
+    key = re.sub(r"[^0-9A-Za-z]", "", id_card or "").upper()
+    return key or None
+
+
+def contact_key(contact):
+    digits = re.sub(r"\D", "", contact or "")
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def blocking_keys(name, id_card, contact):
+    return {"name_key": name_key(name), "id_card_key": id_card_key(id_card), "contact_key": contact_key(contact)}
+
+
+def _similarity(a, b):
+    a, b = normalize_name(a), normalize_name(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score(name, father, id_card, contact, row):
+    # row: (name, father_name, id_card, contact); returns (score, reasons)
+    reasons = []
+    same_id = id_card_key(id_card) is not None and id_card_key(id_card) == id_card_key(row[2])
+    same_contact = contact_key(contact) is not None and contact_key(contact) == contact_key(row[3])
+    name_score = _similarity(name, row[0])
+    father_score = _similarity(father, row[1]) if father and row[1] else name_score
+
+    total = 0.5 * name_score + 0.2 * father_score + 0.2 * same_id + 0.1 * same_contact
+    if same_id:
+        reasons.append("same ID card")
+        total = max(total, 0.9)
+    if same_contact:
+        reasons.append("same contact")
+    if name_score >= 0.8:
+        reasons.append("similar name")
+    return round(total, 2), reasons
+
+
+def find_duplicates(conn, role, name, father, id_card, contact, threshold=MATCH_THRESHOLD):
+    # Best-first list of dicts for existing people who may be this person
+    table, enrolment_col = PEOPLE[role]
+    keys = blocking_keys(name, id_card, contact)
+    clauses = [f"{column}=?" for column, value in keys.items() if value]
+    if not clauses:
+        return []
+
+    rows = conn.execute(f"""
+        SELECT {enrolment_col}, name, father_name, id_card, contact, status
+        FROM {table}
+        WHERE {" OR ".join(clauses)}
+    """, [value for value in keys.values() if value]).fetchall()
+
+    matches = []
+    for enrolment, *person, status in rows:
+        total, reasons = score(name, father, id_card, contact, person)
+        if total >= threshold:
+            matches.append({"enrolment": enrolment, "name": person[0], "father_name": person[1],
+                            "id_card": person[2], "contact": person[3], "status": status,
+                            "score": total, "reasons": ", ".join(reasons)})
+    return sorted(matches, key=lambda m: -m["score"])
+
+
+def backfill_keys(conn):
+    # Fill keys for rows added before the key columns existed, and re-key
+    # non-ASCII names, which older versions normalized to ASCII only
+    for table, _ in PEOPLE.values():
+        rows = conn.execute(f"""
+            SELECT id, name, id_card, contact, name_key, id_card_key, contact_key FROM {table}
+            WHERE (name_key IS NULL AND id_card_key IS NULL AND contact_key IS NULL)
+               OR name GLOB '*[^ -~]*'
+        """).fetchall()
+        updates = []
+        for row_id, name, id_card, contact, *stored in rows:
+            keys = blocking_keys(name, id_card, contact)
+            if list(keys.values()) != stored:
+                updates.append(dict(keys, id=row_id))
+        conn.executemany(f"""
+            UPDATE {table} SET name_key=:name_key, id_card_key=:id_card_key, contact_key=:contact_key
+            WHERE id=:id
+        """, updates)
@@ -0,0 +1,99 @@
+# export_page.py
+
+import time
+
+import streamlit as st
+
+from exporter import (PARQUET_DATASETS, convert_df_to_csv, convert_df_to_xlsx, convert_to_parquet,
+                      get_attendance_df, get_test_df, start_workbook_export)
+
+@st.fragment
+def workbook_export():
+    st.subheader("📚 Full-School Workbook")
+    st.caption("Students, teachers, attendance and test results in one file.")
+
+    if st.button("Build / Get Workbook"):
+        st.session_state.workbook_job = start_workbook_export()
+
+    job = st.session_state.get("workbook_job")
+    if not job:
+        return
+
+    if job["status"] == "running":
+        st.progress(job["progress"], text=job["message"])
+        time.sleep(0.5)
+        st.rerun(scope="fragment")
+    elif job["status"] == "failed":
+        st.error(f"Workbook export failed: {job['message']}")
+    else:
+        try:
+            with open(job["path"], "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Rotated out by a newer build; start over for the current data
+            st.session_state.workbook_job = start_workbook_export()
+            st.rerun(scope="fragment")
+        st.download_button("⬇️ Download Workbook", data=data, file_name="school.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+def export_page():
+    if st.session_state.role != "Admin":
+        st.error("Access denied. Admins only.")
+        return
+
+    st.title("📤 Export Data")
+
+    export_tabs = st.tabs(["Export Attendance", "Export Test Records", "Parquet", "Full Workbook"])
+
+    # === Attendance Export ===
+    with export_tabs[0]:
+        st.subheader("📅 Attendance Records")
+        att_df = get_attendance_df()
+
+        if att_df.empty:
+            st.info("No attendance data found.")
+        else:
+            st.dataframe(att_df, use_container_width=True)
+
+            csv = convert_df_to_csv(att_df)
+            xlsx = convert_df_to_xlsx(att_df)
+
+            st.download_button("⬇️ Download CSV", data=csv, file_name="attendance.csv", mime="text/csv")
+            st.download_button("⬇️ Download Excel", data=xlsx, file_name="attendance.xlsx",
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+    # === Test Record Export ===
+    with export_tabs[1]:
+        st.subheader("🧪 Test Records")
+        test_df = get_test_df()
+
+        if test_df.empty:
+            st.info("No test records found.")
+        else:
+            st.dataframe(test_df, use_container_width=True)
+
+            csv = convert_df_to_csv(test_df)
+            xlsx = convert_df_to_xlsx(test_df)
+
+            st.download_button("⬇️ Download CSV", data=csv, file_name="test_records.csv", mime="text/csv")
+            st.download_button("⬇️ Download Excel", data=xlsx, file_name="test_records.xlsx",
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+    # === Parquet Export ===
+    with export_tabs[2]:
+        st.subheader("🗃️ Parquet (typed, compressed)")
+        dataset = st.selectbox("Dataset", list(PARQUET_DATASETS))
+
+        if st.button("Build Parquet File"):
+            st.session_state.parquet_export = (dataset, convert_to_parquet(dataset))
+
+        built = st.session_state.get("parquet_export")
+        if built and built[0] == dataset:
+            st.download_button("⬇️ Download Parquet", data=built[1], file_name=f"{dataset}.parquet",
+                               mime="application/vnd.apache.parquet")
+
+
+    # === Full Workbook ===
+    with export_tabs[3]:
+        workbook_export()
@@ -1,74 +1,280 @@
 # exporter.py
 
+import argparse
+import hashlib
+import os
 import sqlite3
+import threading
 import pandas as pd
-import streamlit as st
+from datetime import datetime
 from io import BytesIO
 
+import frames
+from read_snapshot import read_connect
+
 DB = "school.db"
 
+# Incremental export queries: rows above the consumer's last id, plus (for
+# test records) rows edited since its last change_seq.
+INCREMENTAL_QUERIES = {
+    "attendance": """
+        SELECT id, enrolment_no, role, date, time, 0 AS change_seq
+        FROM attendance
+        WHERE id > ?
+        ORDER BY id
+    """,
+    "tests": """
+        SELECT tr.id, t.test_name, t.test_date, tr.student_enrolment, tr.obtained_marks, t.full_marks,
+               tr.change_seq
+        FROM test_records tr
+        JOIN tests t ON tr.test_id = t.id
+        WHERE tr.id > ? OR tr.change_seq > ?
+        ORDER BY tr.id
+    """,
+}
+
 def get_attendance_df():
-    with sqlite3.connect(DB) as conn:
-        return pd.read_sql_query("SELECT * FROM attendance ORDER BY date DESC, time DESC", conn)
+    with read_connect(DB) as conn:
+        return frames.load_attendance(conn)
 
 def get_test_df():
-    with sqlite3.connect(DB) as conn:
-        return pd.read_sql_query("""
-            SELECT tr.id, t.test_name, t.test_date, tr.student_enrolment, tr.obtained_marks, t.full_marks
-            FROM test_records tr
-            JOIN tests t ON tr.test_id = t.id
-            ORDER BY t.test_date DESC
-        """, conn)
+    with read_connect(DB) as conn:
+        return frames.load_tests(conn)
 
 def convert_df_to_csv(df):
     return df.to_csv(index=False).encode("utf-8")
 
 def convert_df_to_xlsx(df):
     output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+    with pd.ExcelWriter(output, engine="openpyxl", date_format="YYYY-MM-DD",
+                        datetime_format="YYYY-MM-DD") as writer:
         df.to_excel(writer, index=False, sheet_name="Sheet1")
     return output.getvalue()
 
-def export_page():
-    if st.session_state.role != "Admin":
-        st.error("Access denied. Admins only.")
-        return
+# Typed Parquet exports. Dates and times are converted to day/second
+# offsets in SQL so they load as real date/time columns.
+SQL_DAYS = "CAST(julianday({0}) - 2440587.5 AS INTEGER)"
+SQL_SECONDS = "CAST((julianday('2000-01-01 ' || {0}) - julianday('2000-01-01')) * 86400 + 0.5 AS INTEGER)"
+
+PARQUET_DATASETS = {
+    "attendance": (f"""
+        SELECT id, enrolment_no, role, {SQL_DAYS.format("date")}, {SQL_SECONDS.format("time")}
+        FROM attendance ORDER BY id
+    """, [("id", "int64"), ("enrolment_no", "string"), ("role", "category"), ("date", "date"), ("time", "time")]),
+    "tests": (f"""
+        SELECT tr.id, t.test_name, {SQL_DAYS.format("t.test_date")}, tr.student_enrolment,
+               tr.obtained_marks, t.full_marks
+        FROM test_records tr
+        JOIN tests t ON tr.test_id = t.id
+        ORDER BY tr.id
+    """, [("id", "int64"), ("test_name", "category"), ("test_date", "date"), ("student_enrolment", "string"),
+          ("obtained_marks", "int16"), ("full_marks", "int16")]),
+    "students": ("""
+        SELECT id, name, father_name, mother_name, id_card, contact, student_class, enrolment_no, status
+        FROM students ORDER BY id
+    """, [("id", "int64"), ("name", "string"), ("father_name", "string"), ("mother_name", "string"),
+          ("id_card", "string"), ("contact", "string"), ("student_class", "category"),
+          ("enrolment_no", "string"), ("status", "category")]),
+    "teachers": ("""
+        SELECT id, name, father_name, id_card, education, contact, enrolment_id, status
+        FROM teacher_details ORDER BY id
+    """, [("id", "int64"), ("name", "string"), ("father_name", "string"), ("id_card", "string"),
+          ("education", "category"), ("contact", "string"), ("enrolment_id", "string"), ("status", "category")]),
+}
+
+def write_parquet(dataset, sink, chunk_rows=50_000, compression="zstd", db=DB):
+    # Streams the query into one row group per chunk, so memory is bounded
+    # by chunk_rows rather than the table size.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "int64": pa.int64(),
+        "int16": pa.int16(),
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "date": pa.date32(),
+        "time": pa.time32("s"),
+    }
+    query, columns = PARQUET_DATASETS[dataset]
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+
+    rows_written = 0
+    with read_connect(db) as conn, pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows_written += len(rows)
+    return rows_written
+
+def convert_to_parquet(dataset):
+    output = BytesIO()
+    write_parquet(dataset, output)
+    return output.getvalue()
+
+# Full-school workbook, built in a background thread and cached on disk under
+# a key derived from data_versions so repeat requests reuse the same file.
+WORKBOOK_DIR = "exports"
+WORKBOOK_SHEETS = {
+    "Students": """
+        SELECT id, name, father_name, mother_name, id_card, contact, student_class, enrolment_no, status
+        FROM students ORDER BY id
+    """,
+    "Teachers": """
+        SELECT id, name, father_name, id_card, education, contact, enrolment_id, status
+        FROM teacher_details ORDER BY id
+    """,
+    "Attendance": "SELECT * FROM attendance ORDER BY date DESC, time DESC",
+    "Test Results": """
+        SELECT tr.id, t.test_name, t.test_date, tr.student_enrolment, tr.obtained_marks, t.full_marks
+        FROM test_records tr
+        JOIN tests t ON tr.test_id = t.id
+        ORDER BY t.test_date DESC
+    """,
+}
+EXCEL_MAX_ROWS = 1_048_575   # one row is left for the header
+WORKBOOK_KEEP = 3            # newest workbooks kept so other sessions' downloads survive
 
-    st.title("📤 Export Data")
+_workbook_jobs = {}
+_workbook_lock = threading.Lock()
 
-    export_tabs = st.tabs(["Export Attendance", "Export Test Records"])
+def data_version(conn):
+    rows = conn.execute("""
+        SELECT name, version FROM data_versions
+        WHERE name IN ('students', 'teacher_details', 'attendance', 'tests', 'test_records')
+        ORDER BY name
+    """).fetchall()
+    return hashlib.sha1(repr(rows).encode()).hexdigest()[:12]
 
-    # === Attendance Export ===
-    with export_tabs[0]:
-        st.subheader("📅 Attendance Records")
-        att_df = get_attendance_df()
+def workbook_path(version):
+    return os.path.join(WORKBOOK_DIR, f"school_{version}.xlsx")
 
-        if att_df.empty:
-            st.info("No attendance data found.")
-        else:
-            st.dataframe(att_df, use_container_width=True)
+def _build_workbook(job):
+    try:
+        frames = {}
+        with read_connect(DB) as conn:
+            # One read transaction so every sheet comes from the same snapshot
+            conn.execute("BEGIN")
+            version = data_version(conn)
+            for i, (sheet, query) in enumerate(WORKBOOK_SHEETS.items()):
+                job["message"] = f"Reading {sheet}"
+                frames[sheet] = pd.read_sql_query(query, conn)
+                job["progress"] = (i + 1) / len(WORKBOOK_SHEETS) * 0.4
+            conn.execute("COMMIT")
 
-            csv = convert_df_to_csv(att_df)
-            xlsx = convert_df_to_xlsx(att_df)
+        os.makedirs(WORKBOOK_DIR, exist_ok=True)
+        path = workbook_path(version)
+        tmp_path = path + ".tmp.xlsx"
+        with pd.ExcelWriter(tmp_path, engine="openpyxl") as writer:
+            for i, (sheet, df) in enumerate(frames.items()):
+                job["message"] = f"Writing {sheet}"
+                # Spill sheets past Excel's row limit onto "Sheet (2)", "Sheet (3)", ...
+                for part, start in enumerate(range(0, max(len(df), 1), EXCEL_MAX_ROWS)):
+                    name = sheet if part == 0 else f"{sheet} ({part + 1})"
+                    df.iloc[start:start + EXCEL_MAX_ROWS].to_excel(writer, index=False, sheet_name=name)
+                job["progress"] = 0.4 + (i + 1) / len(frames) * 0.55
+            job["message"] = "Saving"
+        os.replace(tmp_path, path)
 
-            st.download_button("⬇️ Download CSV", data=csv, file_name="attendance.csv", mime="text/csv")
-            st.download_button("⬇️ Download Excel", data=xlsx, file_name="attendance.xlsx",
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        built = [os.path.join(WORKBOOK_DIR, name) for name in os.listdir(WORKBOOK_DIR)
+                 if name.startswith("school_") and name.endswith(".xlsx") and not name.endswith(".tmp.xlsx")]
+        for old in sorted(built, key=os.path.getmtime, reverse=True)[WORKBOOK_KEEP:]:
+            if old != path:
+                os.remove(old)
+
+        job.update(path=path, version=version, progress=1.0, status="done", message="Ready")
+        with _workbook_lock:
+            # Finished jobs for older versions are superseded by this one
+            for key in [k for k, j in _workbook_jobs.items() if k != version and j["status"] != "running"]:
+                del _workbook_jobs[key]
+    except Exception as e:
+        job.update(status="failed", message=str(e))
+
+def start_workbook_export():
+    # Returns the job for the current data version, starting a build if there
+    # is neither a cached file nor a build already running.
+    with read_connect(DB) as conn:
+        version = data_version(conn)
+    path = workbook_path(version)
+
+    with _workbook_lock:
+        if os.path.exists(path):
+            return {"version": version, "status": "done", "progress": 1.0, "message": "Ready", "path": path}
+
+        job = _workbook_jobs.get(version)
+        if job is None or job["status"] == "failed":
+            job = {"version": version, "status": "running", "progress": 0.0, "message": "Queued", "path": path}
+            _workbook_jobs[version] = job
+            threading.Thread(target=_build_workbook, args=(job,), daemon=True).start()
+        return job
+
+def get_watermark(conn, consumer, dataset):
+    row = conn.execute("SELECT last_id, last_change FROM export_watermarks WHERE consumer=? AND dataset=?",
+                       (consumer, dataset)).fetchone()
+    return row if row else (0, 0)
+
+def get_incremental_df(conn, consumer, dataset):
+    last_id, last_change = get_watermark(conn, consumer, dataset)
+    params = (last_id,) if dataset == "attendance" else (last_id, last_change)
+    return pd.read_sql_query(INCREMENTAL_QUERIES[dataset], conn, params=params)
+
+def export_incremental(consumer, dataset, path):
+    # Appends new/changed rows to `path` and only then advances the watermark,
+    # so a failed run is retried in full the next night (consumers upsert by id).
+    with sqlite3.connect(DB) as conn:
+        last_id, last_change = get_watermark(conn, consumer, dataset)
+        df = get_incremental_df(conn, consumer, dataset)
+        if df.empty:
+            return 0
+
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        df.drop(columns="change_seq").to_csv(path, mode="a", header=write_header, index=False)
+
+        conn.execute("""
+            INSERT INTO export_watermarks (consumer, dataset, last_id, last_change, exported_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(consumer, dataset) DO UPDATE SET
+                last_id = excluded.last_id,
+                last_change = excluded.last_change,
+                exported_at = excluded.exported_at
+        """, (consumer, dataset, max(last_id, int(df["id"].max())),
+              max(last_change, int(df["change_seq"].max())), datetime.now().isoformat(timespec="seconds")))
+        conn.commit()
+    return len(df)
+
+def reset_watermark(consumer, dataset):
+    with sqlite3.connect(DB) as conn:
+        conn.execute("DELETE FROM export_watermarks WHERE consumer=? AND dataset=?", (consumer, dataset))
+        conn.commit()
 
-    # === Test Record Export ===
-    with export_tabs[1]:
-        st.subheader("🧪 Test Records")
-        test_df = get_test_df()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless exports for scheduled jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
 
-        if test_df.empty:
-            st.info("No test records found.")
-        else:
-            st.dataframe(test_df, use_container_width=True)
+    # Nightly delta sync, e.g.:
+    #   python exporter.py incremental --consumer district --dataset attendance --output district_attendance.csv
+    incremental = commands.add_parser("incremental", help="Append rows added or changed since the last export")
+    incremental.add_argument("--consumer", required=True, help="Name of the receiving system; each has its own watermark")
+    incremental.add_argument("--dataset", choices=sorted(INCREMENTAL_QUERIES), required=True)
+    incremental.add_argument("--output", required=True, help="CSV file to append to")
+    incremental.add_argument("--reset", action="store_true", help="Forget the watermark and export everything")
 
-            csv = convert_df_to_csv(test_df)
-            xlsx = convert_df_to_xlsx(test_df)
+    parquet = commands.add_parser("parquet", help="Write a typed, compressed Parquet file")
+    parquet.add_argument("--dataset", choices=sorted(PARQUET_DATASETS), required=True)
+    parquet.add_argument("--output", required=True)
+    parquet.add_argument("--chunk-rows", type=int, default=50_000, help="Rows per row group")
 
-            st.download_button("⬇️ Download CSV", data=csv, file_name="test_records.csv", mime="text/csv")
-            st.download_button("⬇️ Download Excel", data=xlsx, file_name="test_records.xlsx",
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    args = parser.parse_args()
 
+    if args.command == "incremental":
+        if args.reset:
+            reset_watermark(args.consumer, args.dataset)
+        count = export_incremental(args.consumer, args.dataset, args.output)
+        print(f"Exported {count} {args.dataset} rows to {args.output}")
+    else:
+        count = write_parquet(args.dataset, args.output, chunk_rows=args.chunk_rows)
+        print(f"Wrote {count} {args.dataset} rows to {args.output}")
@@ -0,0 +1,133 @@
+# frames.py
+# Compact DataFrame loaders for the attendance and test record views and
+# exports. Rows are read in chunks and each chunk is converted before the
+# next is read, so the full result never exists as Python string objects:
+# repeated text (role, enrolment, test name, gate, time of day) becomes
+# categoricals, dates become datetime64 and marks the smallest integer type.
+# Times stay categorical rather than timedelta so CSV/Excel exports keep
+# their HH:MM:SS text.
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CHUNK_ROWS = 50_000
+
+ATTENDANCE_QUERY = """
+    SELECT id, enrolment_no, role, date, time, gate
+    FROM attendance WHERE 1=1{filters}
+    ORDER BY date DESC, time DESC
+"""
+TEST_QUERY = """
+    SELECT tr.id, t.test_name, t.test_date, tr.student_enrolment, tr.obtained_marks, t.full_marks
+    FROM test_records tr
+    JOIN tests t ON tr.test_id = t.id
+    ORDER BY t.test_date DESC
+"""
+
+ATTENDANCE_TYPES = {"id": "int", "enrolment_no": "category", "role": "category", "date": "date",
+                    "time": "category", "gate": "category"}
+TEST_TYPES = {"id": "int", "test_name": "category", "test_date": "date", "student_enrolment": "category",
+              "obtained_marks": "int", "full_marks": "int"}
+
+
+def compact(df, types):
+    for column, kind in types.items():
+        if kind == "category":
+            df[column] = df[column].astype("category")
+        elif kind == "date":
+            df[column] = pd.to_datetime(df[column], format="%Y-%m-%d", errors="coerce")
+        elif kind == "int":
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def concat_compact(chunks, types):
+    # pd.concat turns categoricals with different categories back into
+    # object columns, so categorical columns are unioned separately
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for column in chunks[0].columns:
+        if types.get(column) == "category":
+            columns[column] = union_categoricals([chunk[column] for chunk in chunks])
+        else:
+            columns[column] = pd.concat([chunk[column] for chunk in chunks], ignore_index=True)
+    df = pd.DataFrame(columns)
+    for column, kind in types.items():
+        if kind == "int":
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def read_compact(conn, query, types, params=(), chunk_rows=CHUNK_ROWS):
+    chunks = [compact(chunk, types)
+              for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows)]
+    if not chunks:
+        return compact(pd.read_sql_query(query, conn, params=params), types)
+    return concat_compact(chunks, types)
+
+
+def load_attendance(conn, role=None, date=None, chunk_rows=CHUNK_ROWS):
+    filters, params = "", []
+    if role:
+        filters += " AND role=?"
+        params.append(role)
+    if date:
+        filters += " AND date=?"
+        params.append(date)
+    return read_compact(conn, ATTENDANCE_QUERY.format(filters=filters), ATTENDANCE_TYPES, params, chunk_rows)
+
+
+def load_tests(conn, chunk_rows=CHUNK_ROWS):
+    return read_compact(conn, TEST_QUERY, TEST_TYPES, chunk_rows=chunk_rows)
+
+
+def memory_report(rows=1_000_000, students=5_000):
+    # Object-string frames vs compact frames on a synthetic database
+    import os
+    import sqlite3
+    import tempfile
+    import time
+
+    import numpy as np
+
+    from db_setup import init_db
+
+    path = os.path.join(tempfile.mkdtemp(), "frames.db")
+    init_db(path)
+    rng = np.random.default_rng(0)
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO attendance (enrolment_no, role, date, time, gate) VALUES (?, ?, ?, ?, ?)", (
+            (f"STU-{s}", "student" if s % 20 else "teacher", f"2025-{m:02d}-{d:02d}",
+             f"{7 + h:02d}:{mi:02d}:{se:02d}", f"lane{g}")
+            for s, m, d, h, mi, se, g in zip(
+                rng.integers(0, students, rows), rng.integers(1, 13, rows), rng.integers(1, 29, rows),
+                rng.integers(0, 3, rows), rng.integers(0, 60, rows), rng.integers(0, 60, rows),
+                rng.integers(1, 5, rows))))
+        conn.executemany("INSERT INTO tests (test_name, test_date, full_marks) VALUES (?, ?, 100)",
+                         ((f"Test {i}", f"2025-{i % 12 + 1:02d}-15") for i in range(200)))
+        conn.executemany("INSERT INTO test_records (test_id, student_enrolment, obtained_marks) VALUES (?, ?, ?)",
+                         ((int(t), f"STU-{s}", int(m)) for t, s, m in zip(
+                             rng.integers(1, 201, rows // 2), rng.integers(0, students, rows // 2),
+                             rng.integers(0, 101, rows // 2))))
+
+    with sqlite3.connect(path) as conn:
+        for name, query, loader in [
+            ("attendance", ATTENDANCE_QUERY.format(filters=""), load_attendance),
+            ("tests", TEST_QUERY, load_tests),
+        ]:
+            start = time.perf_counter()
+            plain = pd.read_sql_query(query, conn)
+            plain_s = time.perf_counter() - start
+            start = time.perf_counter()
+            lean = loader(conn)
+            lean_s = time.perf_counter() - start
+            before = plain.memory_usage(deep=True).sum() / 2**20
+            after = lean.memory_usage(deep=True).sum() / 2**20
+            print(f"{name:<11} {len(lean):>9,} rows  {before:8.1f} MB -> {after:6.1f} MB "
+                  f"({before / after:4.1f}x)  load {plain_s:5.2f}s -> {lean_s:5.2f}s")
+            del plain, lean
+
+
+if __name__ == "__main__":
+    memory_report()
@@ -0,0 +1,223 @@
+# gate.py
+# Multi-lane NFC gate. Each reader (by USB path) runs in its own thread and
+# pushes taps onto one shared queue; a single writer thread drains the queue
+# and commits taps in small batches, so several lanes record at once without
+# competing for the SQLite write lock.
+
+import argparse
+import csv
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from anomalies import check_tap
+from attendance_store import find_by_uid, record_attendance
+from nfc_reader import open_frontend, wait_for_uid
+
+DB = "school.db"
+BATCH_MAX = 100           # taps per transaction
+BATCH_WAIT = 0.2          # seconds to keep collecting after the first tap
+OPEN_RETRY_MAX = 30       # seconds between attempts to open an unavailable reader
+DEBOUNCE_SECONDS = 30     # the same card again within this window is ignored
+
+logger = logging.getLogger("school.gate")
+
+Tap = namedtuple("Tap", "uid gate tapped_at received")
+TapResult = namedtuple("TapResult", "tap status enrolment_no role latency")
+
+
+def _open_reader(path, stop, on_error=None):
+    # Keeps trying with backoff while the reader is unplugged or busy, so the
+    # lane comes up when it is connected; None if stopped first
+    delay = 0.5
+    while not stop.is_set():
+        try:
+            return open_frontend(path)
+        except Exception as e:
+            if on_error:
+                on_error(path, e)
+            else:
+                logger.warning("Reader %s unavailable: %s", path, e)
+            stop.wait(delay)
+            delay = min(delay * 2, OPEN_RETRY_MAX)
+    return None
+
+
+def reader_loop(path, taps, stop, on_error=None):
+    clf = _open_reader(path, stop, on_error)
+    if clf is None:
+        return
+    try:
+        while not stop.is_set():
+            try:
+                uid = wait_for_uid(clf, terminate=stop.is_set)
+            except Exception as e:
+                if on_error:
+                    on_error(path, e)
+                time.sleep(0.5)
+                continue
+            if uid:
+                taps.put(Tap(uid, path, datetime.now(), time.perf_counter()))
+    finally:
+        clf.close()
+
+
+class GateWriter:
+    def __init__(self, taps, db=DB, on_result=None):
+        self.taps = taps
+        self.db = db
+        self.on_result = on_result
+        self.debounce_seconds = DEBOUNCE_SECONDS
+        self.last_seen = {}
+
+    def _next_batch(self):
+        try:
+            batch = [self.taps.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + BATCH_WAIT
+        while len(batch) < BATCH_MAX:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.taps.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, conn, tap):
+        person = find_by_uid(conn, tap.uid)
+        if not person:
+            return "unknown", None, None
+
+        last = self.last_seen.get(tap.uid)
+        if last and (tap.tapped_at - last[0]).total_seconds() < self.debounce_seconds:
+            if tap.gate != last[1]:
+                # Not a reader double-read: the same card at another lane
+                check_tap(conn, person[0], person[1], tap.tapped_at.strftime("%Y-%m-%d"),
+                          tap.tapped_at.strftime("%H:%M:%S"), gate=tap.gate)
+            return "duplicate", person[0], person[1]
+        self.last_seen[tap.uid] = (tap.tapped_at, tap.gate)
+
+        record_attendance(conn, person[0], person[1], tap.tapped_at.strftime("%Y-%m-%d"),
+                          tap.tapped_at.strftime("%H:%M:%S"), gate=tap.gate)
+        return "recorded", person[0], person[1]
+
+    def commit_batch(self, conn, batch):
+        for attempt in range(5):
+            seen_before = dict(self.last_seen)
+            try:
+                with conn:
+                    outcomes = [self._process(conn, tap) for tap in batch]
+                break
+            except sqlite3.OperationalError:
+                # Rolled back: undo debounce marks and retry the whole batch
+                self.last_seen = seen_before
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * 2 ** attempt)
+            except sqlite3.Error:
+                # Not retryable, but still rolled back: nothing in the batch was
+                # recorded, so its cards must not be debounced
+                self.last_seen = seen_before
+                raise
+
+        done = time.perf_counter()
+        results = [TapResult(tap, status, enrolment_no, role, done - tap.received)
+                   for tap, (status, enrolment_no, role) in zip(batch, outcomes)]
+        if self.on_result:
+            for result in results:
+                self.on_result(result)
+        return results
+
+    def run(self, stop):
+        conn = sqlite3.connect(self.db, timeout=30)
+        try:
+            while not (stop.is_set() and self.taps.empty()):
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    self.commit_batch(conn, batch)
+                except sqlite3.Error:
+                    logger.exception("Dropped a batch of %d taps", len(batch))
+        finally:
+            conn.close()
+
+
+class Gate:
+    def __init__(self, paths, db=DB, on_result=None, on_error=None):
+        self.paths = paths
+        self.taps = queue.Queue()
+        self.readers_stop = threading.Event()
+        self.writer_stop = threading.Event()
+        self.writer = GateWriter(self.taps, db, on_result)
+        self.on_error = on_error
+        self.reader_threads = []
+        self.writer_thread = None
+
+    def start(self):
+        self.writer_thread = threading.Thread(target=self.writer.run, args=(self.writer_stop,),
+                                              name="gate-writer", daemon=True)
+        self.writer_thread.start()
+        for path in self.paths:
+            thread = threading.Thread(target=reader_loop, args=(path, self.taps, self.readers_stop, self.on_error),
+                                      name=f"gate-reader-{path}", daemon=True)
+            thread.start()
+            self.reader_threads.append(thread)
+
+    def stop(self):
+        # Readers stop first so the writer can drain everything they queued
+        self.readers_stop.set()
+        for thread in self.reader_threads:
+            thread.join()
+        self.writer_stop.set()
+        self.writer_thread.join()
+
+
+def trace_recorder(path):
+    # on_result hook that appends every tap to a CSV trace nfc_sim.py can replay
+    f = open(path, "a", newline="")
+    writer = csv.writer(f)
+    start = time.perf_counter()
+
+    def record(result):
+        writer.writerow([f"{result.tap.received - start:.3f}", result.tap.gate, result.tap.uid])
+        f.flush()
+    return record
+
+
+def print_result(result):
+    tap = result.tap
+    who = f"{result.role} {result.enrolment_no}" if result.enrolment_no else tap.uid
+    print(f"{tap.tapped_at:%H:%M:%S} [{tap.gate}] {result.status:<9} {who} "
+          f"({result.latency * 1000:.0f} ms)", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the NFC attendance gate.")
+    parser.add_argument("--reader", action="append", dest="readers",
+                        help="Reader path, e.g. usb:001:004 (repeat for each lane; default: usb)")
+    parser.add_argument("--record", help="Append every tap to this CSV trace (offset_seconds,gate,uid)")
+    args = parser.parse_args()
+
+    on_result = print_result
+    if args.record:
+        record = trace_recorder(args.record)
+        on_result = lambda result: (print_result(result), record(result))
+
+    gate = Gate(args.readers or ["usb"], on_result=on_result,
+                on_error=lambda path, e: print(f"[{path}] read failed: {e}", flush=True))
+    gate.start()
+    print(f"Gate running with {len(gate.paths)} reader(s). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        gate.stop()
@@ -0,0 +1,41 @@
+# grades.py
+# Grade distributions computed as SQL aggregates: each test record is mapped
+# to a band or percentage bucket inside the query, so only (class, bucket,
+# count) rows leave the database.
+
+GRADE_BANDS = [("A+", 90), ("A", 80), ("B", 70), ("C", 60), ("D", 50), ("F", 0)]  # label, minimum %
+
+PERCENT_SQL = "100.0 * r.obtained_marks / t.full_marks"
+
+
+def band_case(bands=GRADE_BANDS):
+    # CASE expression giving each record's band index (0 = best band)
+    whens = " ".join(f"WHEN {PERCENT_SQL} >= {float(minimum)} THEN {i}"
+                     for i, (_, minimum) in enumerate(bands[:-1]))
+    return f"CASE {whens} ELSE {len(bands) - 1} END"
+
+
+def _distribution(conn, bucket_sql, test_id, by_class):
+    group = "COALESCE(s.student_class, '')" if by_class else "''"
+    return conn.execute(f"""
+        SELECT {group} AS student_class, {bucket_sql} AS bucket, COUNT(*) AS students
+        FROM test_records r
+        JOIN tests t ON t.id = r.test_id
+        LEFT JOIN students s ON s.enrolment_no = r.student_enrolment
+        WHERE r.test_id = ? AND t.full_marks > 0
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, (test_id,)).fetchall()
+
+
+def grade_distribution(conn, test_id, by_class=False, bands=GRADE_BANDS):
+    # [(student_class, grade, students)] in band order; class is '' unless by_class
+    rows = _distribution(conn, band_case(bands), test_id, by_class)
+    return [(student_class, bands[band][0], count) for student_class, band, count in rows]
+
+
+def mark_histogram(conn, test_id, bucket_width=10, by_class=False):
+    # [(student_class, bucket_start_pct, students)]; 100% falls in the top bucket
+    top = 99 // bucket_width * bucket_width
+    bucket_sql = f"MIN(CAST({PERCENT_SQL} / {bucket_width} AS INTEGER) * {bucket_width}, {top})"
+    return _distribution(conn, bucket_sql, test_id, by_class)
@@ -0,0 +1,72 @@
+# intake_store.py
+# Streamlit-free writes for student and teacher records and test marks,
+# shared by the pages and batch jobs. Like attendance_store, the caller owns the
+# transaction.
+
+from dedupe import blocking_keys
+
+
+def insert_student(conn, name, father, mother, id_card, contact, student_class, enrolment_no):
+    # Raises sqlite3.IntegrityError when the enrolment number is taken
+    keys = blocking_keys(name, id_card, contact)
+    conn.execute("""
+        INSERT INTO students
+        (name, father_name, mother_name, id_card, contact, student_class, enrolment_no,
+         name_key, id_card_key, contact_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (name, father, mother, id_card, contact, student_class, enrolment_no,
+          keys["name_key"], keys["id_card_key"], keys["contact_key"]))
+
+
+def insert_teacher(conn, name, father, id_card, education, contact, enrolment_id, username, password_hash):
+    # Details and login in one transaction; IntegrityError if either is taken
+    keys = blocking_keys(name, id_card, contact)
+    conn.execute("""
+        INSERT INTO teacher_details
+        (name, father_name, id_card, education, contact, enrolment_id, name_key, id_card_key, contact_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (name, father, id_card, education, contact, enrolment_id,
+          keys["name_key"], keys["id_card_key"], keys["contact_key"]))
+    conn.execute("INSERT INTO teachers (username, password) VALUES (?, ?)", (username, password_hash))
+
+
+def get_or_create_test(conn, test_name, test_date, full_marks):
+    row = conn.execute("SELECT id FROM tests WHERE test_name=? AND test_date=?", (test_name, test_date)).fetchone()
+    if row:
+        return row[0]
+    return conn.execute("INSERT INTO tests (test_name, test_date, full_marks) VALUES (?, ?, ?)",
+                        (test_name, test_date, full_marks)).lastrowid
+
+
+def insert_test_record(conn, test_id, enrolment_no, obtained_marks):
+    # False when there is no active student with that enrolment number
+    if not conn.execute("SELECT id FROM students WHERE enrolment_no=? AND status='active'",
+                        (enrolment_no,)).fetchone():
+        return False
+    conn.execute("""
+        INSERT INTO test_records (test_id, student_enrolment, obtained_marks)
+        VALUES (?, ?, ?)
+    """, (test_id, enrolment_no, obtained_marks))
+    return True
+
+
+def insert_test(conn, test_name, test_date, full_marks):
+    return conn.execute("INSERT INTO tests (test_name, test_date, full_marks) VALUES (?, ?, ?)",
+                        (test_name, test_date, full_marks)).lastrowid
+
+
+def mark_dropped(conn, enrolment_no):
+    # Name of the student dropped, or None if there is no such active student
+    row = conn.execute("SELECT name FROM students WHERE enrolment_no=? AND status='active'",
+                       (enrolment_no,)).fetchone()
+    if row:
+        conn.execute("UPDATE students SET status='dropped' WHERE enrolment_no=?", (enrolment_no,))
+    return row[0] if row else None
+
+
+def mark_resigned(conn, enrolment_id):
+    row = conn.execute("SELECT name FROM teacher_details WHERE enrolment_id=? AND status='active'",
+                       (enrolment_id,)).fetchone()
+    if row:
+        conn.execute("UPDATE teacher_details SET status='resigned' WHERE enrolment_id=?", (enrolment_id,))
+    return row[0] if row else None
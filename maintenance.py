@@ -0,0 +1,205 @@
+# maintenance.py
+# Routine upkeep for school.db: planner statistics, incremental vacuum, WAL
+# checkpoint and an integrity check. Every task runs under its own time budget
+# and is interrupted when the budget runs out, so a run never holds the
+# database for long while the gate is writing. Run from cron with
+# "python maintenance.py", or set SCHOOL_MAINTENANCE_HOUR to run it daily
+# from the app.
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import perf
+
+DB = "school.db"
+LOG_FILE = "maintenance.log"
+TASKS = ["optimize", "vacuum", "checkpoint", "integrity"]
+TASK_BUDGET = 30          # seconds each task may run before it is interrupted
+VACUUM_PAGES = 256        # pages released per incremental_vacuum step
+ANALYSIS_LIMIT = 1000     # rows sampled per index by ANALYZE
+SCHEDULE_ENV = "SCHOOL_MAINTENANCE_HOUR"
+
+logger = logging.getLogger("school.maintenance")
+if not logger.handlers:
+    handler = logging.FileHandler(LOG_FILE)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def time_budget(conn, seconds):
+    # SQLite calls the progress handler every N VM steps; a non-zero return
+    # aborts the running statement with "interrupted"
+    deadline = time.perf_counter() + seconds
+    conn.set_progress_handler(lambda: int(time.perf_counter() > deadline), 1000)
+    try:
+        yield deadline
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            raise BudgetExceeded() from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def file_sizes(db):
+    return {suffix or "db": os.path.getsize(db + suffix) if os.path.exists(db + suffix) else 0
+            for suffix in ("", "-wal")}
+
+
+def optimize(conn, budget):
+    # A full ANALYZE the first time, then PRAGMA optimize re-analyzes only
+    # tables whose statistics have drifted
+    analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone()
+    conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+    with time_budget(conn, budget):
+        if analyzed:
+            conn.execute("PRAGMA optimize")
+            return "optimized"
+        conn.execute("ANALYZE")
+        return "analyzed"
+
+
+def vacuum(conn, budget):
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return "skipped: auto_vacuum is not incremental (run with --convert once)"
+
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    deadline = time.perf_counter() + budget
+    # Each step is its own short write, so gate taps slot in between steps
+    while time.perf_counter() < deadline:
+        if not conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            break
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+    remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return f"released {before - remaining} pages, {remaining} free pages left"
+
+
+def convert_to_incremental(conn):
+    # One-off full VACUUM so existing databases can use incremental vacuum;
+    # this blocks writers for its whole run, so do it out of hours
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def checkpoint(conn, budget, truncate=False):
+    # PASSIVE copies what it can without waiting on readers or writers;
+    # TRUNCATE also resets the -wal file but waits for the busy timeout
+    mode = "TRUNCATE" if truncate else "PASSIVE"
+    with time_budget(conn, budget):
+        busy, log_frames, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    if log_frames < 0:
+        return "skipped: not in WAL mode"
+    return f"{mode.lower()}: {done}/{log_frames} frames checkpointed" + (" (busy)" if busy else "")
+
+
+def integrity(conn, budget, full=False):
+    check = "integrity_check" if full else "quick_check"
+    with time_budget(conn, budget):
+        problems = [r[0] for r in conn.execute(f"PRAGMA {check}(20)")]
+    if problems == ["ok"]:
+        return f"{check}: ok"
+    for problem in problems:
+        logger.error("%s: %s", check, problem)
+    return f"{check}: {len(problems)} problem(s), first: {problems[0]}"
+
+
+def run_maintenance(db=DB, tasks=TASKS, budget=TASK_BUDGET, full_check=False, truncate=False, convert=False):
+    report = []
+    sizes_before = file_sizes(db)
+    conn = sqlite3.connect(db, timeout=budget, isolation_level=None)
+    try:
+        if convert:
+            with perf.timed("maintenance:convert"):
+                convert_to_incremental(conn)
+
+        for task in tasks:
+            start = time.perf_counter()
+            try:
+                if task == "optimize":
+                    result = optimize(conn, budget)
+                elif task == "vacuum":
+                    result = vacuum(conn, budget)
+                elif task == "checkpoint":
+                    result = checkpoint(conn, budget, truncate)
+                elif task == "integrity":
+                    result = integrity(conn, budget, full_check)
+                else:
+                    raise ValueError(f"Unknown maintenance task: {task}")
+            except BudgetExceeded:
+                result = f"stopped after {budget}s budget"
+            except sqlite3.OperationalError as e:
+                result = f"failed: {e}"
+            elapsed = time.perf_counter() - start
+
+            perf.record(f"maintenance:{task}", elapsed)
+            logger.info("%s %.1fms %s", task, elapsed * 1000, result)
+            report.append({"task": task, "ms": round(elapsed * 1000, 1), "result": result})
+    finally:
+        conn.close()
+
+    sizes_after = file_sizes(db)
+    logger.info("size db %d -> %d bytes, wal %d -> %d bytes", sizes_before["db"], sizes_after["db"],
+                sizes_before["-wal"], sizes_after["-wal"])
+    return {"before": sizes_before, "after": sizes_after, "tasks": report}
+
+
+def _seconds_until(hour):
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def start_scheduler(db=DB, hour=None):
+    # Daily run at the given hour from a daemon thread; returns None when no
+    # hour is configured
+    if hour is None:
+        hour = os.environ.get(SCHEDULE_ENV)
+    if hour in (None, ""):
+        return None
+    hour = int(hour)
+
+    def loop():
+        while True:
+            time.sleep(_seconds_until(hour))
+            try:
+                run_maintenance(db)
+            except Exception:
+                logger.exception("Scheduled maintenance failed")
+
+    thread = threading.Thread(target=loop, name="db-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run database maintenance in bounded time slices.")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--task", action="append", dest="tasks", choices=TASKS,
+                        help="Run only this task (repeatable; default: all)")
+    parser.add_argument("--budget", type=float, default=TASK_BUDGET, help="Seconds allowed per task")
+    parser.add_argument("--full-check", action="store_true", help="integrity_check instead of quick_check")
+    parser.add_argument("--truncate", action="store_true", help="Truncate the WAL file after checkpointing")
+    parser.add_argument("--convert", action="store_true",
+                        help="Switch an existing database to incremental auto_vacuum (full VACUUM, blocks writes)")
+    args = parser.parse_args()
+
+    result = run_maintenance(args.db, args.tasks or TASKS, args.budget, args.full_check, args.truncate, args.convert)
+    for row in result["tasks"]:
+        print(f"{row['task']:<11} {row['ms']:9.1f} ms  {row['result']}")
+    for part in ("db", "-wal"):
+        print(f"{part:<11} {result['before'][part]:>12,} -> {result['after'][part]:>12,} bytes")
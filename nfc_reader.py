@@ -0,0 +1,37 @@
+# nfc_reader.py
+# Single place that opens NFC readers, so the page scanners and the gate
+# share one code path. "sim:<lane>" paths, or any path while SCHOOL_NFC_SIM
+# is set, get a simulated reader from nfc_sim.py instead of hardware.
+
+import os
+
+DEFAULT_PATH = "usb"
+
+
+def open_frontend(path=DEFAULT_PATH):
+    if path.startswith("sim:") or os.environ.get("SCHOOL_NFC_SIM"):
+        import nfc_sim
+        return nfc_sim.get_frontend(path)
+
+    import nfc
+    return nfc.ContactlessFrontend(path)
+
+
+def wait_for_uid(clf, terminate=None):
+    # Blocks until a card is presented (or terminate() returns True) and
+    # returns its UID as hex, or None if terminated.
+    options = {"rdwr": {"on-connect": lambda tag: False}}
+    if terminate is not None:
+        options["terminate"] = terminate
+    tag = clf.connect(**options)
+    if not tag:
+        return None
+    return str(tag.identifier.hex())
+
+
+def read_uid(path=DEFAULT_PATH):
+    clf = open_frontend(path)
+    try:
+        return wait_for_uid(clf)
+    finally:
+        clf.close()
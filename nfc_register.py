@@ -3,15 +3,15 @@
 import sqlite3
 import streamlit as st
 
+from attendance_store import assign_uid
+from nfc_reader import read_uid
+from write_queue import write
+
 DB = "school.db"
 
 def read_nfc_uid():
     try:
-        import nfc
-        clf = nfc.ContactlessFrontend('usb')
-        tag = clf.connect(rdwr={'on-connect': lambda tag: False})
-        clf.close()
-        return str(tag.identifier.hex())
+        return read_uid()
     except Exception as e:
         st.error(f"NFC read failed: {e}")
         return None
@@ -51,18 +51,15 @@ def assign_nfc_uid():
     enrol_input = st.text_input("Enter Enrolment No (student) or Enrolment ID (teacher)")
 
     if uid and enrol_input and st.button("Assign Card"):
-        table = "students" if role == "student" else "teacher_details"
-        enrol_col = "enrolment_no" if role == "student" else "enrolment_id"
-
-        with sqlite3.connect(DB) as conn:
-            cur = conn.cursor()
-            cur.execute(f"SELECT id FROM {table} WHERE {enrol_col}=? AND status='active'", (enrol_input,))
-            if cur.fetchone():
-                cur.execute(f"UPDATE {table} SET nfc_uid=? WHERE {enrol_col}=?", (uid, enrol_input))
-                conn.commit()
-                st.success(f"NFC card assigned to {role} successfully.")
-            else:
-                st.error("No active user found with that enrolment.")
+        try:
+            assigned = write("assign_nfc_uid", assign_uid, role, enrol_input, uid)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        if assigned:
+            st.success(f"NFC card assigned to {role} successfully.")
+        else:
+            st.error("No active user found with that enrolment.")
 
 def nfc_register_page():
     assign_nfc_uid()
\ No newline at end of file
@@ -0,0 +1,243 @@
+# nfc_sim.py
+# Simulated NFC readers and a gate-rush load test.
+#
+# SimulatedFrontend has the parts of nfc.ContactlessFrontend the app uses
+# (connect with rdwr/terminate, close), and nfc_reader.open_frontend returns
+# one for "sim:<lane>" paths, or for every path when SCHOOL_NFC_SIM points at a
+# trace file. Traces are CSV rows of offset_seconds,gate,uid as written by
+# "gate.py --record".
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+SIM_ENV = "SCHOOL_NFC_SIM"
+
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+class SimTag:
+    def __init__(self, uid):
+        self.identifier = bytes.fromhex(uid)
+
+
+class SimulatedFrontend:
+    def __init__(self, taps, speedup=1.0):
+        # taps: list of (offset_seconds, uid) relative to the first connect()
+        self.taps = sorted(taps)
+        self.speedup = speedup
+        self.position = 0
+        self.started = None
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.taps)
+
+    def connect(self, rdwr=None, terminate=None):
+        if self.started is None:
+            self.started = time.perf_counter()
+        if self.exhausted:
+            # Nothing left to replay: behave like an idle reader
+            while not (terminate and terminate()):
+                time.sleep(0.05)
+            return None
+
+        offset, uid = self.taps[self.position]
+        due = self.started + offset / self.speedup
+        while time.perf_counter() < due:
+            if terminate and terminate():
+                return None
+            time.sleep(min(0.01, due - time.perf_counter()))
+
+        self.position += 1
+        tag = SimTag(uid)
+        if rdwr and rdwr.get("on-connect"):
+            rdwr["on-connect"](tag)
+        return tag
+
+    def close(self):
+        pass
+
+
+def load_trace(path):
+    with open(path, newline="") as f:
+        return [(float(row[0]), row[1], row[2]) for row in csv.reader(f) if row and not row[0].startswith("#")]
+
+
+def register_trace(trace, speedup=1.0):
+    # One simulated frontend per gate in the trace; returns the lane names
+    by_gate = defaultdict(list)
+    for offset, gate, uid in trace:
+        by_gate[gate].append((offset, uid))
+    with _lanes_lock:
+        for gate, taps in by_gate.items():
+            _lanes[gate] = SimulatedFrontend(taps, speedup)
+    return sorted(by_gate)
+
+
+def get_frontend(path):
+    lane = path[len("sim:"):] if path.startswith("sim:") else path
+    with _lanes_lock:
+        if lane not in _lanes and os.environ.get(SIM_ENV):
+            trace = load_trace(os.environ[SIM_ENV])
+            matching = [(offset, uid) for offset, gate, uid in trace if gate == lane]
+            _lanes[lane] = SimulatedFrontend(matching or [(offset, uid) for offset, _, uid in trace])
+        if lane not in _lanes:
+            raise IOError(f"No simulated reader registered for '{lane}'")
+        return _lanes[lane]
+
+
+def synthetic_rush(uids, taps=1500, minutes=10, lanes=4, duplicate_rate=0.05, unknown_rate=0.02, seed=None):
+    # Arrivals peak a third of the way into the window, like a morning gate.
+    # Duplicates are the same card re-tapped a few seconds later; unknown
+    # cards are random UIDs that are not registered.
+    rng = random.Random(seed)
+    window = minutes * 60
+    trace = []
+    cards = list(uids)
+    rng.shuffle(cards)
+
+    for i in range(taps):
+        offset = rng.triangular(0, window, window / 3)
+        lane = f"lane{rng.randrange(lanes) + 1}"
+        if rng.random() < unknown_rate:
+            uid = "%014x" % rng.getrandbits(56)
+        else:
+            uid = cards[i % len(cards)]
+        trace.append((offset, lane, uid))
+
+        if rng.random() < duplicate_rate:
+            trace.append((min(window, offset + rng.uniform(0.5, 5)), lane, uid))
+
+    return sorted(trace)
+
+
+def expected_records(trace, known_uids, debounce_seconds):
+    # Per-card number of taps the gate should record, applying the debounce
+    expected = Counter()
+    last = {}
+    for offset, _, uid in sorted(trace):
+        if uid not in known_uids:
+            continue
+        if uid in last and offset - last[uid] < debounce_seconds:
+            continue
+        last[uid] = offset
+        expected[uid] += 1
+    return expected
+
+
+def create_scratch_db(students):
+    from db_setup import init_db
+
+    path = os.path.join(tempfile.mkdtemp(prefix="gate_rush_"), "school.db")
+    init_db(path)
+    uids = ["%014x" % (0x04000000000000 + i) for i in range(students)]
+    with sqlite3.connect(path) as conn:
+        conn.executemany("""
+            INSERT INTO students (name, student_class, enrolment_no, nfc_uid) VALUES (?, ?, ?, ?)
+        """, ((f"Student {i}", f"Class {i % 40}", f"SIM-{i}", uid) for i, uid in enumerate(uids)))
+    return path
+
+
+def run_rush(db, trace, speedup=60.0):
+    import gate
+    from perf import percentile
+
+    lanes = register_trace(trace, speedup)
+    results = []
+    results_lock = threading.Lock()
+
+    def collect(result):
+        with results_lock:
+            results.append(result)
+
+    with sqlite3.connect(db) as conn:
+        known = {r[0]: r[1] for r in conn.execute("""
+            SELECT nfc_uid, enrolment_no FROM students WHERE nfc_uid IS NOT NULL AND status='active'
+            UNION ALL
+            SELECT nfc_uid, enrolment_id FROM teacher_details WHERE nfc_uid IS NOT NULL AND status='active'
+        """)}
+        start_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM attendance").fetchone()[0]
+
+    rush = gate.Gate([f"sim:{lane}" for lane in lanes], db=db, on_result=collect)
+    rush.writer.debounce_seconds = gate.DEBOUNCE_SECONDS / speedup
+    started = time.perf_counter()
+    rush.start()
+    while not all(_lanes[lane].exhausted for lane in lanes):
+        if not any(thread.is_alive() for thread in rush.reader_threads):
+            break
+        time.sleep(0.05)
+    rush.stop()
+    elapsed = time.perf_counter() - started
+
+    with sqlite3.connect(db) as conn:
+        recorded = Counter(r[0] for r in conn.execute(
+            "SELECT enrolment_no FROM attendance WHERE id > ?", (start_id,)))
+
+    expected = expected_records(trace, known, gate.DEBOUNCE_SECONDS)
+    lost = duplicates = 0
+    for uid, enrolment_no in known.items():
+        diff = recorded.get(enrolment_no, 0) - expected.get(uid, 0)
+        if diff < 0:
+            lost -= diff
+        else:
+            duplicates += diff
+
+    latencies = [r.latency for r in results]
+    statuses = Counter(r.status for r in results)
+    return {
+        "taps": len(trace),
+        "processed": len(results),
+        "recorded": statuses["recorded"],
+        "debounced": statuses["duplicate"],
+        "unknown": statuses["unknown"],
+        "unprocessed": len(trace) - len(results),
+        "lost": lost,
+        "duplicate_rows": duplicates,
+        "elapsed_s": round(elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate-rush load test with simulated NFC readers.")
+    parser.add_argument("--trace", help="Replay this recorded trace instead of generating one")
+    parser.add_argument("--db", help="Database to write to (default: a scratch copy with synthetic students)")
+    parser.add_argument("--students", type=int, default=1200)
+    parser.add_argument("--taps", type=int, default=1500)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--lanes", type=int, default=4)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--unknown-rate", type=float, default=0.02)
+    parser.add_argument("--speedup", type=float, default=60.0, help="Replay this many times faster than real time")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    db = args.db or create_scratch_db(args.students)
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        with sqlite3.connect(db) as conn:
+            uids = [r[0] for r in conn.execute("SELECT nfc_uid FROM students WHERE nfc_uid IS NOT NULL")]
+        trace = synthetic_rush(uids, args.taps, args.minutes, args.lanes, args.duplicate_rate,
+                               args.unknown_rate, args.seed)
+
+    print(f"Replaying {len(trace)} taps at {args.speedup:g}x into {db}")
+    for key, value in run_rush(db, trace, args.speedup).items():
+        print(f"{key:<15} {value}")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so nfc_reader sees the same lanes
+    import nfc_sim
+    nfc_sim.main()
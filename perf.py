@@ -0,0 +1,98 @@
+# perf.py
+
+import logging
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+LOG_FILE = "perf.log"
+MAX_SAMPLES = 200
+
+logger = logging.getLogger("school.perf")
+if not logger.handlers:
+    handler = logging.FileHandler(LOG_FILE)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Process-wide timings shared by every session: name -> recent durations in seconds
+_samples = {}
+_lock = threading.Lock()
+
+# perf is the first app module imported, so this approximates server start
+PROCESS_START = time.perf_counter()
+_cold_start_recorded = False
+
+
+def record(name, seconds):
+    with _lock:
+        _samples.setdefault(name, deque(maxlen=MAX_SAMPLES)).append(seconds)
+    logger.info("%s %.1fms", name, seconds * 1000)
+
+
+def mark_cold_start():
+    global _cold_start_recorded
+    with _lock:
+        if _cold_start_recorded:
+            return
+        _cold_start_recorded = True
+    record("cold_start", time.perf_counter() - PROCESS_START)
+
+
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary():
+    with _lock:
+        items = {name: list(values) for name, values in _samples.items()}
+
+    rows = []
+    for name, values in sorted(items.items()):
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "last_ms": round(values[-1] * 1000, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+        })
+    return rows
+
+
+def measure_cold_imports(modules, runs=3):
+    # Each import runs in a fresh interpreter so nothing is already in sys.modules
+    results = {}
+    for module in modules:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", f"import {module}"], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        results[module] = min(timings)
+    return results
+
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] or ["auth", "dashboard", "student", "teacher", "attendance",
+                               "test", "export_page", "nfc_register"]
+    baseline = measure_cold_imports(["sqlite3"])["sqlite3"]
+    for module, seconds in measure_cold_imports(modules).items():
+        ms = (seconds - baseline) * 1000
+        print(f"{module:<16} {ms:8.1f} ms")
+        logger.info("cold_import:%s %.1fms", module, ms)
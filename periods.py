@@ -0,0 +1,171 @@
+# periods.py
+# Period-level attendance. Instead of one row per student per lecture, each
+# class-period session is one row: a reference to the class roster it was
+# taken against and a bitmap with one bit per roster member (bit i set =
+# member i present). Rosters are stored once per distinct membership and
+# shared by every session taken while the class list is unchanged, so a
+# 40-student period costs a 5-byte bitmap plus a few integers.
+
+import hashlib
+from datetime import datetime
+
+PERIOD_MINUTES = 45
+DAY_START = 8 * 60        # minutes after midnight
+
+
+def _clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+# Seeded into an empty periods table: eight back-to-back periods from 08:00
+DEFAULT_PERIODS = [(n, _clock(DAY_START + (n - 1) * PERIOD_MINUTES), _clock(DAY_START + n * PERIOD_MINUTES))
+                   for n in range(1, 9)]
+
+
+# === Bitmaps ===
+def pack(flags):
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+
+def unpack(bitmap, size):
+    return [bool(bitmap[i >> 3] & (1 << (i & 7))) for i in range(size)]
+
+
+# === Periods and timetable ===
+def list_periods(conn):
+    return conn.execute("SELECT number, start_time, end_time FROM periods ORDER BY number").fetchall()
+
+
+def current_period(conn, time=None):
+    time = time or datetime.now().strftime("%H:%M:%S")
+    row = conn.execute("SELECT number FROM periods WHERE ? >= start_time AND ? < end_time",
+                       (time, time)).fetchone()
+    return row[0] if row else None
+
+
+def set_slot(conn, student_class, weekday, period, subject, teacher_enrolment=None):
+    # A blank subject frees the slot
+    if not subject:
+        conn.execute("DELETE FROM timetable WHERE student_class=? AND weekday=? AND period=?",
+                     (student_class, weekday, period))
+        return
+    conn.execute("""
+        INSERT INTO timetable (student_class, weekday, period, subject, teacher_enrolment)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(student_class, weekday, period) DO UPDATE SET
+            subject = excluded.subject,
+            teacher_enrolment = excluded.teacher_enrolment
+    """, (student_class, weekday, period, subject, teacher_enrolment or None))
+
+
+def set_day(conn, student_class, weekday, slots):
+    # slots: [(period, subject, teacher_enrolment)] for one class and weekday
+    for period, subject, teacher_enrolment in slots:
+        set_slot(conn, student_class, weekday, period, subject, teacher_enrolment)
+
+
+def timetable_for(conn, student_class, weekday):
+    # {period: (subject, teacher_enrolment)} for one class and weekday (0 = Monday)
+    return {period: (subject, teacher) for period, subject, teacher in conn.execute("""
+        SELECT period, subject, teacher_enrolment FROM timetable
+        WHERE student_class=? AND weekday=?
+    """, (student_class, weekday))}
+
+
+# === Sessions ===
+def current_members(conn, student_class):
+    # The class's active students in roster order; read-only
+    return [r[0] for r in conn.execute("""
+        SELECT enrolment_no FROM students
+        WHERE status='active' AND student_class=?
+        ORDER BY enrolment_no
+    """, (student_class,))]
+
+
+def roster_for(conn, student_class):
+    # (roster_id, members) for the class's current active students, storing
+    # the roster if this membership is new. Write path only.
+    members = current_members(conn, student_class)
+    signature = hashlib.sha1("\n".join([student_class] + members).encode()).hexdigest()
+    row = conn.execute("SELECT id FROM class_rosters WHERE signature=?", (signature,)).fetchone()
+    if row:
+        return row[0], members
+    cursor = conn.execute("INSERT INTO class_rosters (student_class, signature, members) VALUES (?, ?, ?)",
+                          (student_class, signature, "\n".join(members)))
+    return cursor.lastrowid, members
+
+
+def get_session(conn, date, student_class, period):
+    # (session_id, members, present flags) or None if not taken yet
+    row = conn.execute("""
+        SELECT s.id, r.members, s.present, s.roster_size
+        FROM period_sessions s
+        JOIN class_rosters r ON r.id = s.roster_id
+        WHERE s.date=? AND s.student_class=? AND s.period=?
+    """, (date, student_class, period)).fetchone()
+    if not row:
+        return None
+    members = row[1].split("\n") if row[1] else []
+    return row[0], members, unpack(row[2], row[3])
+
+
+def save_session(conn, date, student_class, period, present_enrolments):
+    # Records who attended; an existing session keeps its roster and is
+    # overwritten. The caller owns the transaction.
+    present_enrolments = set(present_enrolments)
+    existing = get_session(conn, date, student_class, period)
+    if existing:
+        session_id, members, _ = existing
+        flags = [m in present_enrolments for m in members]
+        conn.execute("UPDATE period_sessions SET present=?, present_count=? WHERE id=?",
+                     (pack(flags), sum(flags), session_id))
+        return session_id
+
+    roster_id, members = roster_for(conn, student_class)
+    flags = [m in present_enrolments for m in members]
+    return conn.execute("""
+        INSERT INTO period_sessions (date, student_class, period, roster_id, roster_size, present, present_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (date, student_class, period, roster_id, len(members), pack(flags), sum(flags))).lastrowid
+
+
+# === Per-student views ===
+def student_periods(conn, enrolment_no, start, end):
+    # [(date, period, present)] for every session whose roster included the student
+    rows = conn.execute("""
+        SELECT s.date, s.period, s.present, r.members
+        FROM class_rosters r
+        JOIN period_sessions s ON s.roster_id = r.id
+        WHERE instr(char(10) || r.members || char(10), char(10) || ? || char(10)) > 0
+          AND s.date BETWEEN ? AND ?
+        ORDER BY s.date, s.period
+    """, (enrolment_no, start, end)).fetchall()
+    result = []
+    for date, period, bitmap, members in rows:
+        i = members.split("\n").index(enrolment_no)
+        result.append((date, period, bool(bitmap[i >> 3] & (1 << (i & 7)))))
+    return result
+
+
+def student_daily_rollup(conn, date, student_class=None):
+    # {enrolment_no: (periods_held, periods_present)} for one day
+    query = """
+        SELECT s.present, s.roster_size, r.members
+        FROM period_sessions s JOIN class_rosters r ON r.id = s.roster_id
+        WHERE s.date=?
+    """
+    params = [date]
+    if student_class:
+        query += " AND s.student_class=?"
+        params.append(student_class)
+
+    totals = {}
+    for bitmap, size, members in conn.execute(query, params):
+        for enrolment_no, present in zip(members.split("\n") if members else [], unpack(bitmap, size)):
+            held, attended = totals.get(enrolment_no, (0, 0))
+            totals[enrolment_no] = (held + 1, attended + present)
+    return totals
@@ -0,0 +1,135 @@
+# rankings.py
+# Materialized rank lists. Triggers bump tests.records_version whenever one of
+# a test's records is inserted, edited or deleted; a test's ranks are rebuilt
+# only when that version differs from the one they were built from.
+#
+# The refresh functions write and leave the commit to the caller (pages run
+# them through the write queue); the list functions only read.
+
+from terms import term_bounds
+
+
+def _refresh_test(conn, test_id, version):
+    conn.execute("DELETE FROM test_ranks WHERE test_id=?", (test_id,))
+    conn.execute("""
+        INSERT INTO test_ranks
+        (test_id, student_enrolment, student_class, obtained_marks, percentage, class_rank, school_rank)
+        SELECT r.test_id, r.student_enrolment, s.student_class, r.obtained_marks,
+               ROUND(100.0 * r.obtained_marks / t.full_marks, 1),
+               RANK() OVER (PARTITION BY s.student_class ORDER BY r.obtained_marks DESC),
+               RANK() OVER (ORDER BY r.obtained_marks DESC)
+        FROM (
+            SELECT test_id, student_enrolment, MAX(obtained_marks) AS obtained_marks
+            FROM test_records WHERE test_id=?
+            GROUP BY student_enrolment
+        ) r
+        JOIN tests t ON t.id = r.test_id
+        LEFT JOIN students s ON s.enrolment_no = r.student_enrolment
+    """, (test_id,))
+    conn.execute("""
+        INSERT INTO ranked_tests (test_id, version) VALUES (?, ?)
+        ON CONFLICT(test_id) DO UPDATE SET version = excluded.version
+    """, (test_id, version))
+
+
+def _test_versions(conn, test_id):
+    # (current records_version, version the ranks were built from) or None
+    return conn.execute("""
+        SELECT t.records_version, r.version
+        FROM tests t LEFT JOIN ranked_tests r ON r.test_id = t.id
+        WHERE t.id=?
+    """, (test_id,)).fetchone()
+
+
+def _term_signature(conn, start, end):
+    return conn.execute("""
+        SELECT COALESCE(group_concat(id || ':' || records_version), '')
+        FROM (SELECT id, records_version FROM tests WHERE test_date BETWEEN ? AND ? ORDER BY id)
+    """, (start, end)).fetchone()[0]
+
+
+def ensure_test_ranks(conn, test_id):
+    row = _test_versions(conn, test_id)
+    if row and row[0] != row[1]:
+        _refresh_test(conn, test_id, row[0])
+
+
+def test_ranking(conn, test_id, student_class=None):
+    query = """
+        SELECT tr.class_rank, tr.school_rank, tr.student_enrolment, s.name, tr.student_class,
+               tr.obtained_marks, tr.percentage
+        FROM test_ranks tr
+        LEFT JOIN students s ON s.enrolment_no = tr.student_enrolment
+        WHERE tr.test_id=?
+    """
+    params = [test_id]
+    if student_class:
+        query += " AND tr.student_class=?"
+        params.append(student_class)
+    query += " ORDER BY tr.student_class, tr.class_rank" if student_class is None else " ORDER BY tr.class_rank"
+    return conn.execute(query, params).fetchall()
+
+
+def ensure_term_ranks(conn, date):
+    # Cumulative ranking over all tests in the term containing `date`,
+    # rebuilt only when a test in that term has changed since the last build.
+    start, end = term_bounds(conn, date)
+    signature = _term_signature(conn, start, end)
+    built = conn.execute("SELECT signature FROM ranked_terms WHERE term_start=?", (start,)).fetchone()
+
+    if not built or built[0] != signature:
+        for (test_id,) in conn.execute("SELECT id FROM tests WHERE test_date BETWEEN ? AND ?",
+                                       (start, end)).fetchall():
+            ensure_test_ranks(conn, test_id)
+
+        conn.execute("DELETE FROM term_ranks WHERE term_start=?", (start,))
+        conn.execute("""
+            INSERT INTO term_ranks
+            (term_start, student_enrolment, student_class, tests_taken, average_pct, class_rank, school_rank)
+            SELECT ?, student_enrolment, student_class, COUNT(*), ROUND(AVG(percentage), 1),
+                   RANK() OVER (PARTITION BY student_class ORDER BY AVG(percentage) DESC),
+                   RANK() OVER (ORDER BY AVG(percentage) DESC)
+            FROM test_ranks
+            WHERE test_id IN (SELECT id FROM tests WHERE test_date BETWEEN ? AND ?)
+            GROUP BY student_enrolment
+        """, (start, start, end))
+        conn.execute("""
+            INSERT INTO ranked_terms (term_start, signature) VALUES (?, ?)
+            ON CONFLICT(term_start) DO UPDATE SET signature = excluded.signature
+        """, (start, signature))
+
+
+def ranks_stale(conn, test_id, date):
+    # True when refresh_ranks has something to rebuild; read-only
+    row = _test_versions(conn, test_id)
+    if row and row[0] != row[1]:
+        return True
+    start, end = term_bounds(conn, date)
+    built = conn.execute("SELECT signature FROM ranked_terms WHERE term_start=?", (start,)).fetchone()
+    return not built or built[0] != _term_signature(conn, start, end)
+
+
+def refresh_ranks(conn, test_id, date):
+    ensure_test_ranks(conn, test_id)
+    ensure_term_ranks(conn, date)
+
+
+def term_leaderboard(conn, date, student_class=None, limit=None):
+    start, end = term_bounds(conn, date)
+    query = """
+        SELECT r.class_rank, r.school_rank, r.student_enrolment, s.name, r.student_class,
+               r.tests_taken, r.average_pct
+        FROM term_ranks r
+        LEFT JOIN students s ON s.enrolment_no = r.student_enrolment
+        WHERE r.term_start=?
+    """
+    params = [start]
+    if student_class:
+        query += " AND r.student_class=? ORDER BY r.class_rank"
+        params.append(student_class)
+    else:
+        query += " ORDER BY r.school_rank"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return (start, end), conn.execute(query, params).fetchall()
@@ -0,0 +1,91 @@
+# read_snapshot.py
+# Optional read copy of school.db for dashboards and exports. When
+# SCHOOL_READ_STALENESS is set (seconds), analytics pages read school-read.db
+# (<name>-read.db beside any other database), a copy that is refreshed in
+# the background with backup.copy_database once it is half that age.
+# Reports then never hold read locks or page cache on the file the gate is
+# writing to. Unset or 0 reads school.db directly.
+
+import os
+import sqlite3
+import threading
+import time
+
+from backup import copy_database
+
+DB = "school.db"
+STALENESS_ENV = "SCHOOL_READ_STALENESS"
+
+_refresh_locks = {}       # snapshot path: lock held while it is being rebuilt
+_locks_guard = threading.Lock()
+
+
+def snapshot_path(db=DB):
+    base, _ = os.path.splitext(db)
+    return f"{base}-read.db"
+
+
+def max_staleness():
+    return float(os.environ.get(STALENESS_ENV) or 0)
+
+
+def snapshot_age(snapshot):
+    if not os.path.exists(snapshot):
+        return None
+    return time.time() - os.path.getmtime(snapshot)
+
+
+def refresh(db=DB, snapshot=None):
+    # The copy is built beside the snapshot and renamed over it, so open
+    # readers keep the old file and new connections get the new one
+    snapshot = snapshot or snapshot_path(db)
+    taken_at = time.time()
+    tmp_path = snapshot + ".tmp"
+    # copy_database leaves a rollback journal, so read-only connections need no -wal/-shm files
+    copy_database(db, tmp_path)
+    os.utime(tmp_path, (taken_at, taken_at))
+    os.replace(tmp_path, snapshot)
+
+
+def _refresh_in_background(db, snapshot):
+    with _locks_guard:
+        lock = _refresh_locks.setdefault(snapshot, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            refresh(db, snapshot)
+        finally:
+            lock.release()
+
+    threading.Thread(target=run, name="read-snapshot", daemon=True).start()
+
+
+def snapshot_in_use(db=DB, snapshot=None):
+    # True when reads should go to the snapshot; starts a refresh when it is
+    # getting old. Past the staleness limit reads fall back to the live file.
+    snapshot = snapshot or snapshot_path(db)
+    limit = max_staleness()
+    if not limit:
+        return False
+    age = snapshot_age(snapshot)
+    if age is None or age > limit / 2:
+        _refresh_in_background(db, snapshot)
+    return age is not None and age <= limit
+
+
+def read_connect(db=DB, snapshot=None):
+    snapshot = snapshot or snapshot_path(db)
+    if snapshot_in_use(db, snapshot):
+        # The snapshot is only ever replaced by rename, never written in place
+        return sqlite3.connect(f"file:{snapshot}?mode=ro&immutable=1", uri=True)
+    return sqlite3.connect(db)
+
+
+def as_of(db=DB, snapshot=None):
+    # When the data on analytics pages was taken, or None for live data
+    snapshot = snapshot or snapshot_path(db)
+    if not snapshot_in_use(db, snapshot):
+        return None
+    return os.path.getmtime(snapshot)
@@ -0,0 +1,67 @@
+# report_page.py
+
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import periods
+import reports
+from terms import term_bounds
+
+DB = "school.db"
+
+
+def show_report(conn, report, period):
+    rows, generated_at = reports.load(conn, report, period)
+    if rows is None:
+        rows = reports.compute(conn, report, period)
+        st.caption("Computed live — run `python reports.py` to precompute this period.")
+    else:
+        st.caption(f"Precomputed at {generated_at}")
+
+    if not rows:
+        st.info("No data for this period.")
+        return
+    columns = reports.REPORTS[report][4]
+    st.dataframe(pd.DataFrame(rows, columns=columns).drop(columns=columns[0]),
+                 use_container_width=True, hide_index=True)
+
+
+def report_page():
+    st.title("🗂️ Reports")
+    tabs = st.tabs(["Monthly Attendance", "Period Attendance", "Term Tests"])
+
+    with tabs[0]:
+        month = st.date_input("Month", value=date.today(), key="report_month").strftime("%Y-%m")
+        st.subheader(f"Attendance by class — {month}")
+        with sqlite3.connect(DB) as conn:
+            show_report(conn, "monthly", month)
+
+    with tabs[1]:
+        day = st.date_input("Day", value=date.today(), key="report_periods").strftime("%Y-%m-%d")
+        st.subheader(f"Lecture attendance by class — {day}")
+        with sqlite3.connect(DB) as conn:
+            show_report(conn, "periods", day)
+            classes = [r[0] for r in conn.execute(
+                "SELECT DISTINCT student_class FROM period_sessions WHERE date=? ORDER BY student_class", (day,))]
+
+        if classes:
+            student_class = st.selectbox("Students in class", classes, key="report_periods_class")
+            with sqlite3.connect(DB) as conn:
+                rollup = periods.student_daily_rollup(conn, day, student_class)
+                names = dict(conn.execute("SELECT enrolment_no, name FROM students WHERE student_class=?",
+                                          (student_class,)))
+            df = pd.DataFrame([(e, names.get(e, ""), held, present, held - present)
+                               for e, (held, present) in rollup.items()],
+                              columns=["enrolment_no", "name", "periods_held", "present", "missed"])
+            st.dataframe(df.sort_values(["missed", "enrolment_no"], ascending=[False, True]),
+                         use_container_width=True, hide_index=True)
+
+    with tabs[2]:
+        day = st.date_input("Any day in the term", value=date.today(), key="report_term").strftime("%Y-%m-%d")
+        with sqlite3.connect(DB) as conn:
+            start, end = term_bounds(conn, day)
+            st.subheader(f"Test summaries — term {start} to {end} (pass ≥ {reports.PASS_PCT}%)")
+            show_report(conn, "term", start)
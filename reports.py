@@ -0,0 +1,221 @@
+# reports.py
+# Precomputed attendance and test reports. Run from cron on a quiet machine:
+#
+#   python reports.py              # yesterday and today, their months and terms
+#   python reports.py --days 30    # also backfill the last 30 days
+#
+# Each report period is stored in its own table together with a signature of
+# the source rows inside that period (plus the student roster version), so a
+# rerun skips periods whose own data has not changed. Pages use a stored
+# period only while it is current: its signature still matches, or it was
+# generated after the period ended. Otherwise they run the same query live.
+
+import argparse
+import calendar
+import hashlib
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from class_roll import LATE_AFTER
+from grades import GRADE_BANDS
+from terms import term_bounds
+
+DB = "school.db"
+PASS_PCT = GRADE_BANDS[-2][1]     # lowest passing band
+
+DAILY_SQL = """
+    WITH present AS (
+        SELECT enrolment_no, MIN(time) AS first_in
+        FROM attendance
+        WHERE role='student' AND date=:period
+        GROUP BY enrolment_no
+    )
+    SELECT :period, s.student_class,
+           COUNT(*), COUNT(p.enrolment_no), COUNT(*) - COUNT(p.enrolment_no),
+           COALESCE(SUM(p.first_in > :late_after), 0)
+    FROM students s
+    LEFT JOIN present p ON p.enrolment_no = s.enrolment_no
+    WHERE s.status='active'
+    GROUP BY s.student_class
+    ORDER BY s.student_class
+"""
+
+MONTHLY_SQL = """
+    WITH days AS (
+        SELECT COUNT(DISTINCT date) AS n FROM attendance
+        WHERE role='student' AND date BETWEEN :period || '-01' AND :period || '-31'
+    ),
+    present AS (
+        SELECT enrolment_no, COUNT(DISTINCT date) AS present_days
+        FROM attendance
+        WHERE role='student' AND date BETWEEN :period || '-01' AND :period || '-31'
+        GROUP BY enrolment_no
+    )
+    SELECT :period, s.student_class, COUNT(*), days.n, COALESCE(SUM(p.present_days), 0),
+           ROUND(100.0 * COALESCE(SUM(p.present_days), 0) / MAX(COUNT(*) * days.n, 1), 1)
+    FROM students s
+    CROSS JOIN days
+    LEFT JOIN present p ON p.enrolment_no = s.enrolment_no
+    WHERE s.status='active'
+    GROUP BY s.student_class
+    ORDER BY s.student_class
+"""
+
+TERM_SQL = """
+    SELECT :period, t.id, t.test_name, t.test_date, COALESCE(s.student_class, ''), COUNT(*),
+           ROUND(AVG(100.0 * r.obtained_marks / t.full_marks), 1),
+           ROUND(MAX(100.0 * r.obtained_marks / t.full_marks), 1),
+           ROUND(MIN(100.0 * r.obtained_marks / t.full_marks), 1),
+           ROUND(100.0 * SUM(100.0 * r.obtained_marks / t.full_marks >= :pass_pct) / COUNT(*), 1)
+    FROM tests t
+    JOIN test_records r ON r.test_id = t.id
+    LEFT JOIN students s ON s.enrolment_no = r.student_enrolment
+    WHERE t.test_date BETWEEN :period AND :term_end AND t.full_marks > 0
+    GROUP BY t.id, s.student_class
+    ORDER BY t.test_date, t.id, s.student_class
+"""
+
+# Per-class period attendance from the session bitmaps' stored counts
+PERIOD_SQL = """
+    SELECT :period, student_class, COUNT(*), SUM(roster_size), SUM(present_count),
+           ROUND(100.0 * SUM(present_count) / MAX(SUM(roster_size), 1), 1)
+    FROM period_sessions
+    WHERE date=:period
+    GROUP BY student_class
+    ORDER BY student_class
+"""
+
+# Signatures of the source rows a period is built from. Roster changes
+# (admissions, drops, transfers) move every attendance and test period, so
+# the students counter is part of those signatures.
+STUDENTS_VERSION = "(SELECT version FROM data_versions WHERE name='students')"
+
+DAILY_SIGNATURE = f"""
+    SELECT COUNT(*), TOTAL(id), MAX(time), {STUDENTS_VERSION}
+    FROM attendance WHERE role='student' AND date=:period
+"""
+
+MONTHLY_SIGNATURE = f"""
+    SELECT COUNT(*), TOTAL(id), MAX(date || time), {STUDENTS_VERSION}
+    FROM attendance WHERE role='student' AND date BETWEEN :period || '-01' AND :period || '-31'
+"""
+
+PERIOD_SIGNATURE = """
+    SELECT COUNT(*), group_concat(id || ':' || roster_id || ':' || hex(present))
+    FROM (SELECT id, roster_id, present FROM period_sessions WHERE date=:period ORDER BY id)
+"""
+
+TERM_SIGNATURE = f"""
+    SELECT group_concat(id || ':' || records_version || ':' || full_marks || ':' || test_date || ':' || test_name),
+           {STUDENTS_VERSION}
+    FROM (SELECT * FROM tests WHERE test_date BETWEEN :period AND :term_end ORDER BY id)
+"""
+
+# report: (table, key column, select, source signature, columns)
+REPORTS = {
+    "daily": ("report_daily_attendance", "date", DAILY_SQL, DAILY_SIGNATURE,
+              ["date", "student_class", "expected", "present", "absent", "late"]),
+    "monthly": ("report_monthly_attendance", "month", MONTHLY_SQL, MONTHLY_SIGNATURE,
+                ["month", "student_class", "students", "school_days", "present_days", "attendance_pct"]),
+    "periods": ("report_period_attendance", "date", PERIOD_SQL, PERIOD_SIGNATURE,
+                ["date", "student_class", "periods_held", "possible", "present", "attendance_pct"]),
+    "term": ("report_term_tests", "term_start", TERM_SQL, TERM_SIGNATURE,
+             ["term_start", "test_id", "test_name", "test_date", "student_class", "students",
+              "average_pct", "highest_pct", "lowest_pct", "pass_pct"]),
+}
+
+
+def _params(conn, report, period):
+    params = {"period": period, "late_after": LATE_AFTER, "pass_pct": PASS_PCT}
+    if report == "term":
+        params["term_end"] = term_bounds(conn, period)[1]
+    return params
+
+
+def source_version(conn, report, period):
+    rows = conn.execute(REPORTS[report][3], _params(conn, report, period)).fetchall()
+    return hashlib.sha1(repr(rows).encode()).hexdigest()[:12]
+
+
+def period_end(conn, report, period):
+    # Last date covered by the period
+    if report == "monthly":
+        year, month = map(int, period.split("-"))
+        return f"{period}-{calendar.monthrange(year, month)[1]:02d}"
+    if report == "term":
+        return term_bounds(conn, period)[1]
+    return period
+
+
+def compute(conn, report, period):
+    # The report rows computed live, without storing them
+    _, _, select, _, _ = REPORTS[report]
+    return conn.execute(select, _params(conn, report, period)).fetchall()
+
+
+def precompute(conn, report, period, force=False):
+    # Returns the number of rows stored, or None when the stored report is current
+    table, key, select, _, _ = REPORTS[report]
+    version = source_version(conn, report, period)
+    stored = conn.execute("SELECT source_version FROM report_runs WHERE report=? AND period=?",
+                          (report, period)).fetchone()
+    if stored and stored[0] == version and not force:
+        return None
+
+    conn.execute(f"DELETE FROM {table} WHERE {key}=?", (period,))
+    cursor = conn.execute(f"INSERT INTO {table} {select}", _params(conn, report, period))
+    conn.execute("""
+        INSERT INTO report_runs (report, period, source_version, generated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(report, period) DO UPDATE SET
+            source_version = excluded.source_version,
+            generated_at = excluded.generated_at
+    """, (report, period, version, datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+    return cursor.rowcount
+
+
+def load(conn, report, period):
+    # (rows, generated_at) from the precomputed table, or (None, None) if the
+    # period has not been precomputed or the stored copy is out of date
+    table, key, _, _, columns = REPORTS[report]
+    run = conn.execute("SELECT source_version, generated_at FROM report_runs WHERE report=? AND period=?",
+                       (report, period)).fetchone()
+    if not run:
+        return None, None
+    stored_version, generated_at = run
+    # Generated after the period ended: final, even if the roster has moved since
+    closed = generated_at[:10] > period_end(conn, report, period)
+    if not closed and stored_version != source_version(conn, report, period):
+        return None, None
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {key}=? ORDER BY rowid",
+                        (period,)).fetchall()
+    return rows, generated_at
+
+
+def periods_for(conn, days):
+    # Daily, monthly and term periods covering the given dates
+    periods = {"daily": set(), "periods": set(), "monthly": set(), "term": set()}
+    for day in days:
+        periods["daily"].add(day)
+        periods["periods"].add(day)
+        periods["monthly"].add(day[:7])
+        periods["term"].add(term_bounds(conn, day)[0])
+    return periods
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute attendance and test reports.")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--date", default=date.today().isoformat(), help="Last day to report on (default: today)")
+    parser.add_argument("--days", type=int, default=2,
+                        help="Number of days up to --date to cover (default: yesterday and today)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the source data is unchanged")
+    args = parser.parse_args()
+
+    last = date.fromisoformat(args.date)
+    days = [(last - timedelta(days=i)).isoformat() for i in range(args.days)]
+    with sqlite3.connect(args.db) as conn:
+        for report, periods in periods_for(conn, days).items():
+            for period in sorted(periods):
+                rows = precompute(conn, report, period, args.force)
+                print(f"{report:<8} {period:<10} " + ("unchanged" if rows is None else f"{rows} rows"))
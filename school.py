@@ -0,0 +1,215 @@
+# school.py
+# Headless admin CLI. Uses the same store functions as the pages but never
+# imports streamlit or plotly; pandas/pyarrow load only for exports.
+#
+#   python -m school admin import students new_students.csv
+#   python -m school admin import marks midterm.csv
+#   python -m school admin mark-batch taps.csv --role student
+#   python -m school admin export attendance --format parquet --output attendance.parquet
+#   python -m school admin migrate
+#   python -m school admin stats
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+DB = "school.db"
+
+IMPORT_COLUMNS = {
+    "students": ["name", "father_name", "mother_name", "id_card", "contact", "student_class"],
+    "teachers": ["name", "father_name", "id_card", "education", "contact", "enrolment_id", "username", "password"],
+    "marks": ["test_name", "test_date", "full_marks", "enrolment_no", "obtained_marks"],
+}
+
+
+def read_rows(path, required):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in required if c not in (reader.fieldnames or [])]
+        if missing:
+            raise SystemExit(f"{path}: missing column(s) {', '.join(missing)}")
+        return [{k: (v or "").strip() for k, v in row.items()} for row in reader]
+
+
+def import_people(conn, kind, rows, allow_duplicates):
+    from auth import get_hashed_password
+    from dedupe import find_duplicates
+    from intake_store import insert_student, insert_teacher
+
+    role = "student" if kind == "students" else "teacher"
+    stamp = datetime.now().strftime("%y%m%d%H%M%S")
+    counts = {"added": 0, "duplicates": 0, "exists": 0}
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN")   # so releasing a row savepoint doesn't commit it on its own
+    for i, row in enumerate(rows, start=1):
+        matches = find_duplicates(conn, role, row["name"], row["father_name"], row["id_card"], row["contact"])
+        if matches and not allow_duplicates:
+            best = matches[0]
+            print(f"line {i + 1}: skipped {row['name']!r}, may be {best['enrolment']} "
+                  f"{best['name']!r} ({best['score']}: {best['reasons']})")
+            counts["duplicates"] += 1
+            continue
+        # A teacher is two INSERTs; a taken username must not leave the details row behind
+        conn.execute("SAVEPOINT row")
+        try:
+            if kind == "students":
+                enrolment = row.get("enrolment_no") or f"STU-{stamp}-{i}"
+                insert_student(conn, row["name"], row["father_name"], row["mother_name"], row["id_card"],
+                               row["contact"], row["student_class"], enrolment)
+            else:
+                enrolment = row["enrolment_id"] or f"TCH-{stamp}-{i}"
+                insert_teacher(conn, row["name"], row["father_name"], row["id_card"], row["education"],
+                               row["contact"], enrolment, row["username"],
+                               get_hashed_password(row["password"]))
+            conn.execute("RELEASE row")
+            counts["added"] += 1
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK TO row")
+            conn.execute("RELEASE row")
+            print(f"line {i + 1}: enrolment or username already exists")
+            counts["exists"] += 1
+    return counts
+
+
+def import_marks(conn, rows):
+    from intake_store import get_or_create_test, insert_test_record
+
+    counts = {"added": 0, "unknown_student": 0}
+    for i, row in enumerate(rows, start=1):
+        test_id = get_or_create_test(conn, row["test_name"], row["test_date"], int(row["full_marks"]))
+        if insert_test_record(conn, test_id, row["enrolment_no"], int(row["obtained_marks"])):
+            counts["added"] += 1
+        else:
+            print(f"line {i + 1}: no active student {row['enrolment_no']!r}")
+            counts["unknown_student"] += 1
+    return counts
+
+
+def cmd_import(args):
+    rows = read_rows(args.file, IMPORT_COLUMNS[args.kind])
+    with sqlite3.connect(args.db) as conn:
+        # One transaction: a failed file leaves the database untouched
+        if args.kind == "marks":
+            counts = import_marks(conn, rows)
+        else:
+            counts = import_people(conn, args.kind, rows, args.allow_duplicates)
+        conn.commit()
+    print(", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+def cmd_mark_batch(args):
+    # CSV of enrolment_no with optional role, date and time columns
+    from attendance_store import mark_if_active
+
+    now = datetime.now()
+    rows = read_rows(args.file, ["enrolment_no"])
+    taps = sorted((row.get("date") or now.strftime("%Y-%m-%d"), row.get("time") or now.strftime("%H:%M:%S"),
+                   row["enrolment_no"], row.get("role") or args.role) for row in rows)
+
+    recorded = unknown = 0
+    with sqlite3.connect(args.db) as conn:
+        # Oldest first so the absence counters close days in order
+        for date, time, enrolment_no, role in taps:
+            if mark_if_active(conn, enrolment_no, role, date, time, gate=args.gate):
+                recorded += 1
+            else:
+                print(f"no active {role} {enrolment_no!r}")
+                unknown += 1
+        conn.commit()
+    print(f"recorded: {recorded}, unknown: {unknown}")
+
+
+def cmd_export(args):
+    import exporter
+    import frames
+
+    if args.format == "parquet":
+        count = exporter.write_parquet(args.dataset, args.output, db=args.db)
+    else:
+        if args.dataset not in ("attendance", "tests"):
+            raise SystemExit("csv/xlsx exports support the attendance and tests datasets")
+        with sqlite3.connect(args.db) as conn:
+            df = frames.load_attendance(conn) if args.dataset == "attendance" else frames.load_tests(conn)
+        data = exporter.convert_df_to_csv(df) if args.format == "csv" else exporter.convert_df_to_xlsx(df)
+        with open(args.output, "wb") as f:
+            f.write(data)
+        count = len(df)
+    print(f"Wrote {count} {args.dataset} rows to {args.output}")
+
+
+def cmd_migrate(args):
+    from db_setup import init_db
+
+    init_db(args.db)
+    with sqlite3.connect(args.db) as conn:
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'").fetchone()[0]
+        indexes = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index'").fetchone()[0]
+        triggers = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='trigger'").fetchone()[0]
+    print(f"{args.db} is up to date: {tables} tables, {indexes} indexes, {triggers} triggers")
+
+
+def cmd_stats(args):
+    today = datetime.now().strftime("%Y-%m-%d")
+    queries = [
+        ("active students", "SELECT COUNT(*) FROM students WHERE status='active'", ()),
+        ("active teachers", "SELECT COUNT(*) FROM teacher_details WHERE status='active'", ()),
+        ("attendance rows", "SELECT COUNT(*) FROM attendance", ()),
+        ("present today", "SELECT COUNT(DISTINCT enrolment_no) FROM attendance WHERE date=? AND role='student'",
+         (today,)),
+        ("last attendance", "SELECT MAX(date) FROM attendance", ()),
+        ("tests", "SELECT COUNT(*) FROM tests", ()),
+        ("test records", "SELECT COUNT(*) FROM test_records", ()),
+    ]
+    with sqlite3.connect(args.db) as conn:
+        for label, query, params in queries:
+            print(f"{label:<16} {conn.execute(query, params).fetchone()[0]}")
+        print(f"{'journal mode':<16} {conn.execute('PRAGMA journal_mode').fetchone()[0]}")
+    for suffix in ("", "-wal"):
+        if os.path.exists(args.db + suffix):
+            print(f"{'size' + suffix:<16} {os.path.getsize(args.db + suffix):,} bytes")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m school", description="School management command line.")
+    areas = parser.add_subparsers(dest="area", required=True)
+    admin = areas.add_parser("admin", help="Batch administration")
+    admin.add_argument("--db", default=DB)
+    commands = admin.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="Import students, teachers or test marks from CSV")
+    p.add_argument("kind", choices=sorted(IMPORT_COLUMNS))
+    p.add_argument("file")
+    p.add_argument("--allow-duplicates", action="store_true", help="Add people even if they look like duplicates")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("mark-batch", help="Record attendance for every enrolment in a CSV")
+    p.add_argument("file")
+    p.add_argument("--role", choices=["student", "teacher"], default="student", help="Role when the CSV has none")
+    p.add_argument("--gate", default="batch", help="Value stored in attendance.gate")
+    p.set_defaults(func=cmd_mark_batch)
+
+    p = commands.add_parser("export", help="Export a dataset to CSV, Excel or Parquet")
+    p.add_argument("dataset", choices=["attendance", "tests", "students", "teachers"])
+    p.add_argument("--format", choices=["csv", "xlsx", "parquet"], default="csv")
+    p.add_argument("--output", required=True)
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("migrate", help="Create or upgrade tables, indexes and triggers")
+    p.set_defaults(func=cmd_migrate)
+
+    p = commands.add_parser("stats", help="Print row counts and database size")
+    p.set_defaults(func=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,6 +5,10 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 
+from dedupe import find_duplicates
+from intake_store import insert_student, mark_dropped
+from write_queue import write
+
 DB = "school.db"
 
 def generate_enrolment_no():
@@ -13,6 +17,7 @@ def generate_enrolment_no():
         now = datetime.now().strftime("%y%m%d%H%M%S")
         return f"STU-{now}"
 
+@st.fragment
 def add_student_form():
     st.subheader("➕ Add New Student")
 
@@ -24,6 +29,7 @@ def add_student_form():
         contact = st.text_input("Contact Number")
         student_class = st.text_input("Class")
         enrolment_no = st.text_input("Enrolment Number (leave blank to auto-generate)", value="")
+        allow_duplicate = st.checkbox("Add even if a possible duplicate is found")
 
         submitted = st.form_submit_button("Add Student")
 
@@ -32,21 +38,27 @@ def add_student_form():
                 st.warning("Please fill in all fields.")
                 return
 
+            with sqlite3.connect(DB) as conn:
+                matches = find_duplicates(conn, "student", name, father, id_card, contact)
+            if matches and not allow_duplicate:
+                st.warning(f"{len(matches)} existing student(s) may be the same person. "
+                           "Tick \"Add even if a possible duplicate is found\" to add anyway.")
+                st.dataframe(pd.DataFrame(matches), use_container_width=True, hide_index=True)
+                return
+
             if enrolment_no.strip() == "":
                 enrolment_no = generate_enrolment_no()
 
             try:
-                with sqlite3.connect(DB) as conn:
-                    conn.execute("""
-                        INSERT INTO students 
-                        (name, father_name, mother_name, id_card, contact, student_class, enrolment_no)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (name, father, mother, id_card, contact, student_class, enrolment_no))
-                    conn.commit()
+                write("add_student", insert_student, name, father, mother, id_card, contact,
+                      student_class, enrolment_no)
                 st.success(f"Student added with Enrolment No: {enrolment_no}")
             except sqlite3.IntegrityError:
                 st.error("Enrolment number already exists!")
+            except sqlite3.OperationalError:
+                st.error("The database is busy, please try again.")
 
+@st.fragment
 def live_search_students():
     st.subheader("🔍 Search Students")
 
@@ -67,22 +79,22 @@ def live_search_students():
 
     st.dataframe(df, use_container_width=True)
 
+@st.fragment
 def drop_student():
     st.subheader("📤 Drop Student")
 
     enrolment_no = st.text_input("Enter Enrolment Number to Drop")
 
     if st.button("Drop Student"):
-        with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT name FROM students WHERE enrolment_no=? AND status='active'", (enrolment_no,))
-            result = c.fetchone()
-            if result:
-                c.execute("UPDATE students SET status='dropped' WHERE enrolment_no=?", (enrolment_no,))
-                conn.commit()
-                st.success(f"Student '{result[0]}' has been dropped.")
-            else:
-                st.error("No active student found with that enrolment number.")
+        try:
+            name = write("drop_student", mark_dropped, enrolment_no)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        if name:
+            st.success(f"Student '{name}' has been dropped.")
+        else:
+            st.error("No active student found with that enrolment number.")
 
 def student_page():
     if st.session_state.role != "Admin":
@@ -0,0 +1,166 @@
+# student_profile.py
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+import perf
+import periods
+
+DB = "school.db"
+CACHE_SIZE = 500
+
+# Profile, per-day attendance and test history assembled by SQLite as one
+# JSON document, so a profile is a single query on the enrolment indexes.
+PROFILE_QUERY = """
+    SELECT
+        (SELECT version FROM student_versions WHERE enrolment_no = :e),
+        json_object(
+            'profile', (
+                SELECT json_object('name', name, 'father_name', father_name, 'mother_name', mother_name,
+                                   'id_card', id_card, 'contact', contact, 'student_class', student_class,
+                                   'enrolment_no', enrolment_no, 'status', status)
+                FROM students WHERE enrolment_no = :e
+            ),
+            'attendance', (
+                SELECT json_group_array(json_array(date, first_in, taps))
+                FROM (
+                    SELECT date, MIN(time) AS first_in, COUNT(*) AS taps
+                    FROM attendance
+                    WHERE enrolment_no = :e AND role = 'student'
+                    GROUP BY date ORDER BY date
+                )
+            ),
+            'tests', (
+                SELECT json_group_array(json_array(test_name, test_date, obtained_marks, full_marks))
+                FROM (
+                    SELECT t.test_name, t.test_date, tr.obtained_marks, t.full_marks
+                    FROM test_records tr
+                    JOIN tests t ON t.id = tr.test_id
+                    WHERE tr.student_enrolment = :e
+                    ORDER BY t.test_date
+                )
+            )
+        )
+"""
+
+# enrolment_no -> (version, profile); shared by every session in the process.
+# student_versions is bumped by triggers on that student's writes and
+# data_versions['period_sessions'] on any period register, so a hit costs two
+# primary-key lookups.
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_profile(conn, enrolment_no):
+    version = conn.execute("""
+        SELECT (SELECT version FROM student_versions WHERE enrolment_no=?),
+               (SELECT version FROM data_versions WHERE name='period_sessions')
+    """, (enrolment_no,)).fetchone()
+
+    with _cache_lock:
+        cached = _cache.get(enrolment_no)
+        if cached and cached[0] == version:
+            _cache.move_to_end(enrolment_no)
+            return cached[1]
+
+    student_version, document = conn.execute(PROFILE_QUERY, {"e": enrolment_no}).fetchone()
+    profile = json.loads(document)
+    if profile["profile"] is None:
+        return None
+    # Lectures come from the shared rosters, so they are keyed on their own version
+    profile["lectures"] = periods.student_periods(conn, enrolment_no, "0000-01-01", "9999-12-31")
+    version = (student_version, version[1])
+
+    with _cache_lock:
+        _cache[enrolment_no] = (version, profile)
+        _cache.move_to_end(enrolment_no)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return profile
+
+
+def attendance_calendar(days):
+    # Month x day-of-month grid with the first tap time on present days
+    if not days:
+        return pd.DataFrame()
+    df = pd.DataFrame(days, columns=["date", "first_in", "taps"])
+    df["month"] = df["date"].str[:7]
+    df["day"] = df["date"].str[8:10].astype(int)
+    grid = df.pivot(index="month", columns="day", values="first_in")
+    return grid.reindex(columns=range(1, 32)).fillna("").sort_index(ascending=False)
+
+
+def student_profile_page():
+    st.title("🧑‍🎓 Student Profile")
+
+    keyword = st.text_input("Find student by name or enrolment number")
+    if not keyword:
+        return
+
+    with sqlite3.connect(DB) as conn:
+        matches = conn.execute("""
+            SELECT enrolment_no, name, student_class FROM students
+            WHERE enrolment_no = ? OR name LIKE ?
+            ORDER BY enrolment_no = ? DESC, name LIMIT 20
+        """, (keyword, f"%{keyword}%", keyword)).fetchall()
+
+    if not matches:
+        st.info("No matching students.")
+        return
+
+    options = {f"{name} ({enrolment_no}, class {student_class})": enrolment_no
+               for enrolment_no, name, student_class in matches}
+    enrolment_no = options[st.selectbox("Student", list(options))]
+
+    start = time.perf_counter()
+    with sqlite3.connect(DB) as conn:
+        profile = load_profile(conn, enrolment_no)
+    elapsed = time.perf_counter() - start
+    perf.record("student_profile", elapsed)
+
+    if profile is None:
+        st.error("Student not found.")
+        return
+
+    info = profile["profile"]
+    st.subheader(f"{info['name']} — {info['enrolment_no']}")
+    st.caption(f"Loaded in {elapsed * 1000:.0f} ms")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Class", info["student_class"])
+    col2.metric("Status", info["status"])
+    col3.metric("Days Present", len(profile["attendance"]))
+    tests = pd.DataFrame(profile["tests"], columns=["test_name", "test_date", "obtained_marks", "full_marks"])
+    if not tests.empty:
+        tests["percentage"] = (tests["obtained_marks"] / tests["full_marks"] * 100).round(1)
+        col4.metric("Average %", f"{tests['percentage'].mean():.1f}")
+
+    st.markdown(f"Father: {info['father_name']} · Mother: {info['mother_name']} · "
+                f"ID card: {info['id_card']} · Contact: {info['contact']}")
+
+    st.markdown("**Attendance Calendar** (first tap time)")
+    st.dataframe(attendance_calendar(profile["attendance"]), use_container_width=True)
+
+    st.markdown("**Lecture Attendance** (last 30 days)")
+    start_day = (pd.Timestamp.today() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+    lectures = [lecture for lecture in profile["lectures"] if lecture[0] >= start_day]
+    if not lectures:
+        st.info("No period attendance taken.")
+    else:
+        grid = pd.DataFrame(lectures, columns=["date", "period", "present"])
+        grid["present"] = grid["present"].map({True: "✓", False: "✗"})
+        st.dataframe(grid.pivot(index="date", columns="period", values="present").fillna("")
+                     .sort_index(ascending=False), use_container_width=True)
+
+    st.markdown("**Test History**")
+    if tests.empty:
+        st.info("No test records.")
+    else:
+        st.dataframe(tests, use_container_width=True)
+        st.line_chart(tests, x="test_date", y="percentage")
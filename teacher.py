@@ -6,6 +6,11 @@ import streamlit as st
 from datetime import datetime
 import hashlib
 
+import workhours
+from dedupe import find_duplicates
+from intake_store import insert_teacher, mark_resigned
+from write_queue import write
+
 DB = "school.db"
 
 def get_hashed_password(password):
@@ -15,6 +20,7 @@ def generate_enrolment_id():
     now = datetime.now().strftime("%y%m%d%H%M%S")
     return f"TCH-{now}"
 
+@st.fragment
 def add_teacher_form():
     st.subheader("➕ Add New Teacher")
 
@@ -28,6 +34,7 @@ def add_teacher_form():
 
         username = st.text_input("Login Username")
         password = st.text_input("Login Password", type="password")
+        allow_duplicate = st.checkbox("Add even if a possible duplicate is found")
 
         submitted = st.form_submit_button("Add Teacher")
 
@@ -36,30 +43,27 @@ def add_teacher_form():
                 st.warning("Please fill in all fields.")
                 return
 
+            with sqlite3.connect(DB) as conn:
+                matches = find_duplicates(conn, "teacher", name, father, id_card, contact)
+            if matches and not allow_duplicate:
+                st.warning(f"{len(matches)} existing teacher(s) may be the same person. "
+                           "Tick \"Add even if a possible duplicate is found\" to add anyway.")
+                st.dataframe(pd.DataFrame(matches), use_container_width=True, hide_index=True)
+                return
+
             if enrolment_id.strip() == "":
                 enrolment_id = generate_enrolment_id()
 
             try:
-                with sqlite3.connect(DB) as conn:
-                    # Insert into teacher details
-                    conn.execute("""
-                        INSERT INTO teacher_details 
-                        (name, father_name, id_card, education, contact, enrolment_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (name, father, id_card, education, contact, enrolment_id))
-
-                    # Insert into login credentials
-                    conn.execute("""
-                        INSERT INTO teachers (username, password)
-                        VALUES (?, ?)
-                    """, (username, get_hashed_password(password)))
-
-                    conn.commit()
-
+                write("add_teacher", insert_teacher, name, father, id_card, education, contact, enrolment_id,
+                      username, get_hashed_password(password))
                 st.success(f"Teacher added with Enrolment ID: {enrolment_id}")
-            except sqlite3.IntegrityError as e:
+            except sqlite3.IntegrityError:
                 st.error("Username or Enrolment ID already exists.")
+            except sqlite3.OperationalError:
+                st.error("The database is busy, please try again.")
 
+@st.fragment
 def live_search_teachers():
     st.subheader("🔍 Search Teachers")
 
@@ -80,22 +84,54 @@ def live_search_teachers():
 
     st.dataframe(df, use_container_width=True)
 
+@st.fragment
 def resign_teacher():
     st.subheader("📤 Resign Teacher")
 
     enrolment_id = st.text_input("Enter Enrolment ID to Resign")
 
     if st.button("Resign Teacher"):
+        try:
+            name = write("resign_teacher", mark_resigned, enrolment_id)
+        except sqlite3.OperationalError:
+            st.error("The database is busy, please try again.")
+            return
+        if name:
+            st.success(f"Teacher '{name}' has been marked as resigned.")
+        else:
+            st.error("No active teacher found with that enrolment ID.")
+
+@st.fragment
+def working_hours():
+    st.subheader("⏱️ Working Hours")
+
+    month = st.date_input("Month", value=datetime.now().date(), key="hours_month").strftime("%Y-%m")
+    try:
         with sqlite3.connect(DB) as conn:
-            c = conn.cursor()
-            c.execute("SELECT name FROM teacher_details WHERE enrolment_id=? AND status='active'", (enrolment_id,))
-            result = c.fetchone()
-            if result:
-                c.execute("UPDATE teacher_details SET status='resigned' WHERE enrolment_id=?", (enrolment_id,))
-                conn.commit()
-                st.success(f"Teacher '{result[0]}' has been marked as resigned.")
-            else:
-                st.error("No active teacher found with that enrolment ID.")
+            current = workhours.is_current(conn)
+        if not current:
+            write("workhours_refresh", workhours.refresh)
+    except sqlite3.OperationalError:
+        st.warning("The database is busy; hours may not include the latest taps.")
+    with sqlite3.connect(DB) as conn:
+        summary = pd.DataFrame(workhours.payroll(conn, month), columns=workhours.PAYROLL_COLUMNS)
+
+    if summary.empty:
+        st.info("No teacher attendance this month.")
+        return
+
+    st.caption(f"First tap is time in, last tap is time out; late after {workhours.LATE_AFTER}. "
+               "Incomplete days have a single tap.")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.download_button("⬇️ Download Payroll CSV", data=summary.to_csv(index=False).encode("utf-8"),
+                       file_name=f"payroll_{month}.csv", mime="text/csv")
+
+    teacher = st.selectbox("Daily detail for", summary["enrolment_id"])
+    with sqlite3.connect(DB) as conn:
+        days = workhours.daily_hours(conn, month, teacher)
+    st.dataframe(pd.DataFrame(days, columns=["enrolment_id", "date", "first_in", "last_out", "taps", "hours",
+                                             "late"]),
+                 use_container_width=True, hide_index=True)
 
 def teacher_page():
     if st.session_state.role != "Admin":
@@ -104,7 +140,7 @@ def teacher_page():
 
     st.title("👨‍🏫 Teacher Management")
 
-    tabs = st.tabs(["Add Teacher", "Search Teachers", "Resign Teacher"])
+    tabs = st.tabs(["Add Teacher", "Search Teachers", "Resign Teacher", "Working Hours"])
 
     with tabs[0]:
         add_teacher_form()
@@ -112,4 +148,6 @@ def teacher_page():
         live_search_teachers()
     with tabs[2]:
         resign_teacher()
+    with tabs[3]:
+        working_hours()
 
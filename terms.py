@@ -0,0 +1,35 @@
+# terms.py
+# School terms. Admins may define them in the terms table; where a date falls
+# outside every defined term it belongs to a default four-month block
+# (Jan-Apr, May-Aug, Sep-Dec).
+
+
+def default_term_start_sql(col):
+    return (f"substr({col}, 1, 5) || printf('%02d', ((CAST(substr({col}, 6, 2) AS INTEGER) - 1) / 4) * 4 + 1)"
+            f" || '-01'")
+
+
+def term_start_sql(col):
+    # SQL expression giving the start date of the term containing the date in `col`
+    return (f"COALESCE((SELECT start_date FROM terms WHERE {col} BETWEEN start_date AND end_date),"
+            f" {default_term_start_sql(col)})")
+
+
+def list_terms(conn):
+    return conn.execute("SELECT id, name, start_date, end_date FROM terms ORDER BY start_date").fetchall()
+
+
+def add_term(conn, name, start_date, end_date):
+    conn.execute("INSERT INTO terms (name, start_date, end_date) VALUES (?, ?, ?)",
+                 (name, start_date, end_date))
+
+
+def term_bounds(conn, date):
+    # (start_date, end_date) of the term containing `date`
+    row = conn.execute("SELECT start_date, end_date FROM terms WHERE ? BETWEEN start_date AND end_date",
+                       (date,)).fetchone()
+    if row:
+        return row
+    return conn.execute(f"SELECT {default_term_start_sql('?')}, "
+                        f"date({default_term_start_sql('?')}, '+4 months', '-1 day')",
+                        (date, date, date, date)).fetchone()
@@ -3,10 +3,18 @@
 import sqlite3
 import pandas as pd
 import streamlit as st
+import plotly.express as px
 from datetime import date
 
+import frames
+import grades
+import rankings
+from intake_store import insert_test, insert_test_record
+from write_queue import write
+
 DB = "school.db"
 
+@st.fragment
 def create_test():
     st.subheader("🧪 Create New Test")
 
@@ -18,14 +26,16 @@ def create_test():
         submitted = st.form_submit_button("Create Test")
 
         if submitted:
-            with sqlite3.connect(DB) as conn:
-                conn.execute("""
-                    INSERT INTO tests (test_name, test_date, full_marks)
-                    VALUES (?, ?, ?)
-                """, (test_name, test_date.strftime("%Y-%m-%d"), full_marks))
-                conn.commit()
-                st.success("Test created successfully!")
-
+            try:
+                write("create_test", insert_test, test_name, test_date.strftime("%Y-%m-%d"), full_marks)
+            except sqlite3.OperationalError:
+                st.error("The database is busy, please try again.")
+                return
+            # Full rerun so the "Add Student Marks" fragment sees the new test
+            st.session_state.test_flash = "Test created successfully!"
+            st.rerun()
+
+@st.fragment
 def add_test_records():
     st.subheader("➕ Add Student Marks to Test")
 
@@ -48,33 +58,24 @@ def add_test_records():
         submitted = st.form_submit_button("Add Record")
 
         if submitted:
-            with sqlite3.connect(DB) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id FROM students WHERE enrolment_no=? AND status='active'", (enrolment_no,))
-                result = cursor.fetchone()
+            try:
+                added = write("add_test_record", insert_test_record, test_id, enrolment_no, obtained_marks)
+            except sqlite3.OperationalError:
+                st.error("The database is busy, please try again.")
+                return
 
-                if not result:
-                    st.error("No active student found with that enrolment number.")
-                    return
+            if not added:
+                st.error("No active student found with that enrolment number.")
+                return
 
-                cursor.execute("""
-                    INSERT INTO test_records (test_id, student_enrolment, obtained_marks)
-                    VALUES (?, ?, ?)
-                """, (test_id, enrolment_no, obtained_marks))
-                conn.commit()
-
-                st.success(f"Score added for {enrolment_no}.")
+            st.success(f"Score added for {enrolment_no}.")
 
+@st.fragment
 def view_test_records():
     st.subheader("📑 View Test Records")
 
     with sqlite3.connect(DB) as conn:
-        df = pd.read_sql_query("""
-            SELECT tr.id, t.test_name, t.test_date, tr.student_enrolment, tr.obtained_marks, t.full_marks
-            FROM test_records tr
-            JOIN tests t ON tr.test_id = t.id
-            ORDER BY t.test_date DESC
-        """, conn)
+        df = frames.load_tests(conn)
 
     if df.empty:
         st.info("No test records found.")
@@ -82,10 +83,100 @@ def view_test_records():
         df["Percentage"] = (df["obtained_marks"] / df["full_marks"]) * 100
         st.dataframe(df, use_container_width=True)
 
+@st.fragment
+def view_rankings():
+    st.subheader("🏆 Rankings")
+
+    with sqlite3.connect(DB) as conn:
+        tests = conn.execute("SELECT id, test_name, test_date FROM tests ORDER BY test_date DESC, id DESC").fetchall()
+        classes = [r[0] for r in conn.execute(
+            "SELECT DISTINCT student_class FROM students WHERE status='active' ORDER BY student_class")]
+
+    if not tests:
+        st.info("No tests available.")
+        return
+
+    student_class = st.selectbox("Class", ["All"] + classes)
+    student_class = None if student_class == "All" else student_class
+    columns = ["class_rank", "school_rank", "enrolment_no", "name", "class"]
+
+    test_map = {f"{name} ({d})": tid for tid, name, d in tests}
+    test_selected = st.selectbox("Test", list(test_map.keys()), key="ranking_test")
+    term_date = st.date_input("Any date in the term", value=date.today(), key="ranking_term_date")
+    term = term_date.strftime("%Y-%m-%d")
+    try:
+        # Reruns only queue a write when marks have changed since the last build
+        with sqlite3.connect(DB) as conn:
+            stale = rankings.ranks_stale(conn, test_map[test_selected], term)
+        if stale:
+            write("refresh_ranks", rankings.refresh_ranks, test_map[test_selected], term)
+    except sqlite3.OperationalError:
+        st.warning("The database is busy; rankings may not include the latest marks.")
+
+    with sqlite3.connect(DB) as conn:
+        ranks = rankings.test_ranking(conn, test_map[test_selected], student_class)
+    st.dataframe(pd.DataFrame(ranks, columns=columns + ["obtained_marks", "percentage"]),
+                 use_container_width=True)
+
+    st.markdown("**Term Leaderboard**")
+    with sqlite3.connect(DB) as conn:
+        (start, end), board = rankings.term_leaderboard(conn, term, student_class)
+    st.caption(f"Average percentage over tests from {start} to {end}")
+    st.dataframe(pd.DataFrame(board, columns=columns + ["tests_taken", "average_pct"]),
+                 use_container_width=True)
+
+@st.fragment
+def grade_distribution():
+    st.subheader("📶 Grade Distribution")
+
+    with sqlite3.connect(DB) as conn:
+        tests = conn.execute("SELECT id, test_name, test_date FROM tests ORDER BY test_date DESC, id DESC").fetchall()
+
+    if not tests:
+        st.info("No tests available.")
+        return
+
+    test_map = {f"{name} ({d})": tid for tid, name, d in tests}
+    test_id = test_map[st.selectbox("Test", list(test_map), key="grades_test")]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mode = st.radio("Show", ["Grade bands", "Percentage buckets"], horizontal=True)
+    with col2:
+        bucket_width = st.select_slider("Bucket width (%)", [5, 10, 20, 25], value=10,
+                                        disabled=mode == "Grade bands")
+    with col3:
+        by_class = st.checkbox("Split by class")
+
+    with sqlite3.connect(DB) as conn:
+        if mode == "Grade bands":
+            rows = grades.grade_distribution(conn, test_id, by_class)
+            order = [label for label, _ in grades.GRADE_BANDS]
+        else:
+            rows = [(c, f"{b}–{min(b + bucket_width, 100)}%", n)
+                    for c, b, n in grades.mark_histogram(conn, test_id, bucket_width, by_class)]
+            order = [f"{b}–{min(b + bucket_width, 100)}%" for b in range(0, 100, bucket_width)]
+
+    if not rows:
+        st.info("No records for this test.")
+        return
+
+    df = pd.DataFrame(rows, columns=["student_class", "bucket", "students"])
+    fig = px.bar(df, x="bucket", y="students", color="student_class" if by_class else None,
+                 barmode="group", category_orders={"bucket": order},
+                 labels={"bucket": "Grade" if mode == "Grade bands" else "Score", "student_class": "Class"})
+    st.plotly_chart(fig, use_container_width=True)
+    if mode == "Grade bands":
+        bands = ", ".join(f"{label} ≥ {minimum}%" for label, minimum in grades.GRADE_BANDS[:-1])
+        st.caption(f"Bands: {bands}, otherwise {grades.GRADE_BANDS[-1][0]}")
+
 def test_page():
     st.title("🧪 Test Management")
 
-    tabs = st.tabs(["Create Test", "Add Student Marks", "View Test Records"])
+    if "test_flash" in st.session_state:
+        st.success(st.session_state.pop("test_flash"))
+
+    tabs = st.tabs(["Create Test", "Add Student Marks", "View Test Records", "Rankings", "Grade Distribution"])
 
     with tabs[0]:
         create_test()
@@ -93,4 +184,8 @@ def test_page():
         add_test_records()
     with tabs[2]:
         view_test_records()
+    with tabs[3]:
+        view_rankings()
+    with tabs[4]:
+        grade_distribution()
 
@@ -0,0 +1,20 @@
+# tests/conftest.py
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_setup import init_db  # noqa: E402
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "school.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        yield conn
+    conn.close()
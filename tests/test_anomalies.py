@@ -0,0 +1,72 @@
+# tests/test_anomalies.py
+
+import queue
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import anomalies
+from attendance_store import record_attendance
+from gate import GateWriter, Tap
+from intake_store import insert_student
+
+
+@pytest.fixture(autouse=True)
+def fresh_windows():
+    anomalies.reset()
+    yield
+    anomalies.reset()
+
+
+def _kinds(conn):
+    return [r[0] for r in conn.execute("SELECT kind FROM anomalies ORDER BY id")]
+
+
+def test_rules(conn):
+    record_attendance(conn, "STU-1", "student", "2026-03-02", "03:02:00", "north")
+    record_attendance(conn, "STU-2", "student", "2026-03-02", "08:00:00", "north")
+    record_attendance(conn, "STU-2", "student", "2026-03-02", "08:00:20", "south")
+    for minute in range(5):
+        record_attendance(conn, "STU-3", "student", "2026-03-02", f"10:0{minute}:00", "north")
+    assert _kinds(conn) == ["odd_hour", "gate_hop", "burst"]
+
+
+def test_flags_survive_rollback_and_retry(conn):
+    record_attendance(conn, "STU-1", "student", "2026-03-02", "08:00:00", "north")
+    conn.commit()
+
+    with pytest.raises(sqlite3.OperationalError):
+        with conn:
+            record_attendance(conn, "STU-1", "student", "2026-03-02", "08:00:10", "south")
+            raise sqlite3.OperationalError("database is locked")
+    assert _kinds(conn) == []
+
+    with conn:
+        record_attendance(conn, "STU-1", "student", "2026-03-02", "08:00:10", "south")
+    assert _kinds(conn) == ["gate_hop"]
+
+
+def test_gate_batch_retry_keeps_gate_hop(conn):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    conn.execute("UPDATE students SET nfc_uid='CARD-1' WHERE enrolment_no='STU-1'")
+    conn.commit()
+
+    writer = GateWriter(queue.Queue())
+    real_process, calls = writer._process, []
+
+    def flaky(conn, tap):
+        result = real_process(conn, tap)
+        calls.append(tap)
+        if len(calls) == 2:
+            raise sqlite3.OperationalError("database is locked")
+        return result
+
+    writer._process = flaky
+    batch = [Tap("CARD-1", "north", datetime(2026, 3, 2, 8, 0, 0), 0.0),
+             Tap("CARD-1", "south", datetime(2026, 3, 2, 8, 0, 10), 0.0)]
+    results = writer.commit_batch(conn, batch)
+
+    assert [r.status for r in results] == ["recorded", "duplicate"]
+    assert conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0] == 1
+    assert _kinds(conn) == ["gate_hop"]
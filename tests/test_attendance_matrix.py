@@ -0,0 +1,38 @@
+# tests/test_attendance_matrix.py
+
+from attendance_matrix import AttendanceMatrix
+from attendance_store import record_attendance
+from intake_store import insert_student
+
+
+def _present(matrix, enrolment_no):
+    return matrix.present[matrix.row_of[enrolment_no]].tolist()
+
+
+def test_refresh_picks_up_student_added_later(conn):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    record_attendance(conn, "STU-1", "student", "2026-03-02", "08:00:00")
+    conn.commit()
+    matrix = AttendanceMatrix(conn.execute("PRAGMA database_list").fetchone()[2])
+    assert matrix.refresh() == 1
+
+    insert_student(conn, "Ravi", "", "", "", "", "5", "STU-2")
+    record_attendance(conn, "STU-2", "student", "2026-03-03", "08:00:00")
+    conn.commit()
+    assert matrix.refresh() == 1
+    assert _present(matrix, "STU-1") == [True, False]
+    assert _present(matrix, "STU-2") == [False, True]
+
+
+def test_tap_before_student_row_is_kept(conn):
+    record_attendance(conn, "STU-9", "student", "2026-03-02", "08:00:00")
+    conn.commit()
+    matrix = AttendanceMatrix(conn.execute("PRAGMA database_list").fetchone()[2])
+    matrix.refresh()
+    assert "STU-9" not in matrix.row_of
+
+    insert_student(conn, "Meena", "", "", "", "", "5", "STU-9")
+    conn.commit()
+    matrix.refresh()
+    assert _present(matrix, "STU-9") == [True]
+    assert matrix.absence_rates()[1].tolist() == [0.0]
@@ -0,0 +1,24 @@
+# tests/test_backup.py
+
+import os
+import shutil
+
+import backup
+from intake_store import insert_student
+
+
+def test_backup_verify_rotate_leaves_only_db_files(conn, tmp_path):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    conn.commit()
+    db = conn.execute("PRAGMA database_list").fetchone()[2]
+    directory = str(tmp_path / "backups")
+
+    result = backup.backup(db, directory, sleep=0)
+    assert backup.verify(result["path"], backup.table_counts(conn)) == []
+    for old in ("school-20200101-000000.db", "school-20200102-000000.db"):
+        shutil.copy(result["path"], os.path.join(directory, old))
+
+    removed = backup.rotate(directory, keep=2)
+    assert [os.path.basename(p) for p in removed] == ["school-20200101-000000.db"]
+    names = sorted(os.listdir(directory))
+    assert names == ["school-20200102-000000.db", os.path.basename(result["path"])]
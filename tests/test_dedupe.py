@@ -0,0 +1,32 @@
+# tests/test_dedupe.py
+
+import dedupe
+from intake_store import insert_student
+
+
+def test_normalize_keeps_non_ascii_letters():
+    assert dedupe.normalize_name("José  Müller-Smith") == "jose muller smith"
+    assert dedupe.normalize_name("राम शर्मा") == "राम शर्मा"
+
+
+def test_accented_and_plain_spellings_share_a_key():
+    assert dedupe.name_key("José Müller") == dedupe.name_key("Jose Muller")
+
+
+def test_devanagari_name_has_key_and_similarity():
+    assert dedupe.name_key("राम शर्मा")
+    assert dedupe.name_key("रामू शर्मा") == dedupe.name_key("राम शर्मा")
+    assert dedupe._similarity("राम शर्मा", "रामू शर्मा") > 0.8
+
+
+def test_find_duplicates_matches_non_ascii_name(conn):
+    insert_student(conn, "राम शर्मा", "मोहन शर्मा", "", "", "", "5", "STU-1")
+    matches = dedupe.find_duplicates(conn, "student", "राम  शर्मा", "मोहन शर्मा", "", "")
+    assert [m["enrolment"] for m in matches] == ["STU-1"]
+
+
+def test_backfill_rekeys_non_ascii_names(conn):
+    insert_student(conn, "Zoë Müller", "", "", "", "", "5", "STU-1")
+    conn.execute("UPDATE students SET name_key='Z000L600' WHERE enrolment_no='STU-1'")   # old "zo m ller" key
+    dedupe.backfill_keys(conn)
+    assert conn.execute("SELECT name_key FROM students").fetchone()[0] == dedupe.name_key("Zoe Muller")
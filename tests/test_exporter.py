@@ -0,0 +1,98 @@
+# tests/test_exporter.py
+
+import csv
+import datetime
+import os
+import time
+
+import pytest
+
+import exporter
+from attendance_store import record_attendance
+from intake_store import insert_student, insert_test, insert_test_record
+
+
+@pytest.fixture
+def db(conn, monkeypatch):
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    monkeypatch.setattr(exporter, "DB", path)
+    monkeypatch.delenv("SCHOOL_READ_STALENESS", raising=False)
+    return path
+
+
+def test_incremental_export_picks_up_edited_records(conn, db, tmp_path):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    insert_student(conn, "Ravi", "", "", "", "", "5", "STU-2")
+    test_id = insert_test(conn, "Unit 1", "2026-03-02", 50)
+    insert_test_record(conn, test_id, "STU-1", 40)
+    insert_test_record(conn, test_id, "STU-2", 30)
+    conn.commit()
+    output = str(tmp_path / "district_tests.csv")
+
+    assert exporter.export_incremental("district", "tests", output) == 2
+    assert exporter.export_incremental("district", "tests", output) == 0
+
+    conn.execute("UPDATE test_records SET obtained_marks=35 WHERE student_enrolment='STU-2'")
+    conn.commit()
+    assert exporter.export_incremental("district", "tests", output) == 1
+
+    # Editing the test re-exports every record in it
+    conn.execute("UPDATE tests SET full_marks=60 WHERE id=?", (test_id,))
+    conn.commit()
+    assert exporter.export_incremental("district", "tests", output) == 2
+    assert exporter.export_incremental("district", "tests", output) == 0
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["student_enrolment"], r["obtained_marks"], r["full_marks"]) for r in rows] == [
+        ("STU-1", "40", "50"), ("STU-2", "30", "50"), ("STU-2", "35", "50"),
+        ("STU-1", "40", "60"), ("STU-2", "35", "60")]
+
+
+def test_watermarks_are_per_consumer(conn, db, tmp_path):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    insert_test_record(conn, insert_test(conn, "Unit 1", "2026-03-02", 50), "STU-1", 40)
+    conn.commit()
+    assert exporter.export_incremental("district", "tests", str(tmp_path / "a.csv")) == 1
+    assert exporter.export_incremental("board", "tests", str(tmp_path / "b.csv")) == 1
+
+
+def test_parquet_has_typed_columns(conn, db, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    record_attendance(conn, "STU-1", "student", "2026-03-02", "08:05:30")
+    conn.commit()
+    path = str(tmp_path / "attendance.parquet")
+    assert exporter.write_parquet("attendance", path, db=db) == 1
+
+    table = pq.read_table(path)
+    assert table.schema.field("date").type == pa.date32()
+    assert table.column("date")[0].as_py() == datetime.date(2026, 3, 2)
+    assert table.column("time")[0].as_py() == datetime.time(8, 5, 30)
+
+
+def _wait(job):
+    deadline = time.monotonic() + 30
+    while job["status"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return job
+
+
+def test_workbook_is_cached_per_version_and_rotated(conn, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "WORKBOOK_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(exporter, "_workbook_jobs", {})
+
+    paths = []
+    for i in range(exporter.WORKBOOK_KEEP + 1):
+        insert_student(conn, f"Student {i}", "", "", "", "", "5", f"STU-{i}")
+        conn.commit()
+        job = _wait(exporter.start_workbook_export())
+        assert job["status"] == "done", job["message"]
+        paths.append(job["path"])
+        # Unchanged data reuses the file without a new build
+        assert exporter.start_workbook_export() == {"version": job["version"], "status": "done",
+                                                    "progress": 1.0, "message": "Ready", "path": job["path"]}
+
+    assert len(set(paths)) == len(paths)
+    assert sorted(os.listdir(tmp_path / "exports")) == sorted(os.path.basename(p) for p in paths[1:])
+    assert len(exporter._workbook_jobs) <= 1
@@ -0,0 +1,48 @@
+# tests/test_gate.py
+
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+import gate
+from gate import GateWriter, Tap
+from intake_store import insert_student
+
+
+def test_unavailable_reader_is_reported_and_retried(monkeypatch):
+    stop, errors = threading.Event(), []
+
+    def busy(path):
+        if len(errors) == 2:
+            stop.set()
+        raise OSError("device busy")
+
+    monkeypatch.setattr(gate, "open_frontend", busy)
+    monkeypatch.setattr(stop, "wait", lambda timeout: None)
+    gate.reader_loop("usb:001", queue.Queue(), stop, on_error=lambda path, e: errors.append((path, str(e))))
+    assert errors == [("usb:001", "device busy")] * 3
+
+
+def test_failed_batch_undoes_debounce(conn):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    conn.execute("UPDATE students SET nfc_uid='CARD-1' WHERE enrolment_no='STU-1'")
+    conn.commit()
+
+    writer = GateWriter(queue.Queue())
+    real_process = writer._process
+
+    def failing(conn, tap):
+        real_process(conn, tap)
+        raise sqlite3.IntegrityError("constraint failed")
+
+    writer._process = failing
+    tap = Tap("CARD-1", "north", datetime(2026, 3, 2, 8, 0, 0), 0.0)
+    with pytest.raises(sqlite3.IntegrityError):
+        writer.commit_batch(conn, [tap])
+    assert writer.last_seen == {}
+
+    writer._process = real_process
+    assert [r.status for r in writer.commit_batch(conn, [tap])] == ["recorded"]
@@ -0,0 +1,36 @@
+# tests/test_periods.py
+
+import periods
+from intake_store import insert_student
+
+
+def _class(conn, size=10):
+    for i in range(size):
+        insert_student(conn, f"Student {i}", "", "", "", "", "5", f"STU-{i:02d}")
+
+
+def test_viewing_an_untaken_period_writes_nothing(conn):
+    _class(conn)
+    assert len(periods.current_members(conn, "5")) == 10
+    assert periods.get_session(conn, "2026-03-02", "5", 1) is None
+    assert conn.execute("SELECT COUNT(*) FROM class_rosters").fetchone()[0] == 0
+
+
+def test_sessions_share_a_roster_and_roll_up_per_student(conn):
+    _class(conn)
+    periods.save_session(conn, "2026-03-02", "5", 1, ["STU-00", "STU-01"])
+    periods.save_session(conn, "2026-03-02", "5", 2, ["STU-00", "STU-09"])
+    assert conn.execute("SELECT COUNT(*) FROM class_rosters").fetchone()[0] == 1
+
+    rollup = periods.student_daily_rollup(conn, "2026-03-02", "5")
+    assert rollup["STU-00"] == (2, 2)
+    assert rollup["STU-09"] == (2, 1)
+    assert rollup["STU-05"] == (2, 0)
+    assert periods.student_periods(conn, "STU-09", "2026-03-01", "2026-03-31") == [
+        ("2026-03-02", 1, False), ("2026-03-02", 2, True)]
+
+
+def test_set_day_updates_and_frees_slots(conn):
+    periods.set_day(conn, "5", 0, [(1, "Maths", "TCH-1"), (2, "Science", None)])
+    periods.set_day(conn, "5", 0, [(1, "Maths", "TCH-2"), (2, "", None)])
+    assert periods.timetable_for(conn, "5", 0) == {1: ("Maths", "TCH-2")}
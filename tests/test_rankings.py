@@ -0,0 +1,18 @@
+# tests/test_rankings.py
+
+import rankings
+from intake_store import insert_student, insert_test, insert_test_record
+
+
+def test_ranks_stale_only_after_marks_change(conn):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    test_id = insert_test(conn, "Unit 1", "2026-03-02", 50)
+    insert_test_record(conn, test_id, "STU-1", 40)
+    assert rankings.ranks_stale(conn, test_id, "2026-03-02")
+
+    rankings.refresh_ranks(conn, test_id, "2026-03-02")
+    assert not rankings.ranks_stale(conn, test_id, "2026-03-02")
+
+    insert_student(conn, "Ravi", "", "", "", "", "5", "STU-2")
+    insert_test_record(conn, test_id, "STU-2", 45)
+    assert rankings.ranks_stale(conn, test_id, "2026-03-02")
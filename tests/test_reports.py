@@ -0,0 +1,42 @@
+# tests/test_reports.py
+
+from datetime import date
+
+import reports
+from attendance_store import record_attendance
+from intake_store import insert_student
+
+
+def _setup(conn):
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    insert_student(conn, "Ravi", "", "", "", "", "5", "STU-2")
+
+
+def test_load_ignores_stored_day_once_its_data_changes(conn):
+    _setup(conn)
+    today = date.today().isoformat()
+    # Cron just after midnight: the new day has no taps yet
+    reports.precompute(conn, "daily", today)
+    assert reports.load(conn, "daily", today)[0][0][3] == 0
+
+    record_attendance(conn, "STU-1", "student", today, "08:00:00")
+    assert reports.load(conn, "daily", today) == (None, None)
+
+    reports.precompute(conn, "daily", today)
+    assert reports.load(conn, "daily", today)[0][0][3] == 1
+
+
+def test_closed_period_stays_valid_after_roster_change(conn):
+    _setup(conn)
+    reports.precompute(conn, "daily", "2020-01-01")
+    insert_student(conn, "Meena", "", "", "", "", "5", "STU-3")
+    rows, generated_at = reports.load(conn, "daily", "2020-01-01")
+    assert rows and generated_at
+
+
+def test_version_is_scoped_to_the_period(conn):
+    _setup(conn)
+    assert reports.precompute(conn, "daily", "2026-03-01") is not None
+    record_attendance(conn, "STU-1", "student", "2026-03-02", "08:00:00")
+    assert reports.precompute(conn, "daily", "2026-03-01") is None
+    assert reports.precompute(conn, "daily", "2026-03-02") is not None
@@ -0,0 +1,23 @@
+# tests/test_school.py
+
+import school
+
+TEACHER = {"father_name": "", "id_card": "", "education": "", "contact": "", "password": "pw"}
+
+
+def test_taken_username_leaves_no_teacher_behind(conn):
+    rows = [dict(TEACHER, name="Anil Kumar", enrolment_id="TCH-1", username="anil"),
+            dict(TEACHER, name="Sunita Rao", enrolment_id="TCH-2", username="anil")]
+    counts = school.import_people(conn, "teachers", rows, allow_duplicates=False)
+    conn.commit()
+
+    assert counts == {"added": 1, "duplicates": 0, "exists": 1}
+    assert conn.execute("SELECT enrolment_id FROM teacher_details").fetchall() == [("TCH-1",)]
+
+
+def test_blank_teacher_enrolment_is_generated(conn):
+    rows = [dict(TEACHER, name="Anil Kumar", enrolment_id="", username="anil"),
+            dict(TEACHER, name="Sunita Rao", enrolment_id="", username="sunita")]
+    assert school.import_people(conn, "teachers", rows, allow_duplicates=False)["added"] == 2
+    ids = [r[0] for r in conn.execute("SELECT enrolment_id FROM teacher_details")]
+    assert len(set(ids)) == 2 and all(i.startswith("TCH-") for i in ids)
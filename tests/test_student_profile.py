@@ -0,0 +1,17 @@
+# tests/test_student_profile.py
+
+import periods
+import student_profile
+from intake_store import insert_student
+
+
+def test_profile_cache_picks_up_new_period_sessions(conn):
+    student_profile._cache.clear()
+    insert_student(conn, "Asha", "", "", "", "", "5", "STU-1")
+    insert_student(conn, "Ravi", "", "", "", "", "5", "STU-2")
+    assert student_profile.load_profile(conn, "STU-1")["lectures"] == []
+
+    # Only the roster-level version moves; STU-1's own version does not
+    periods.save_session(conn, "2026-03-02", "5", 1, ["STU-1"])
+    assert student_profile.load_profile(conn, "STU-1")["lectures"] == [("2026-03-02", 1, True)]
+    assert student_profile._cache["STU-1"][1] is student_profile.load_profile(conn, "STU-1")
@@ -0,0 +1,42 @@
+# tests/test_workhours.py
+
+import workhours
+from attendance_store import record_attendance
+
+
+def _taps(conn, *taps):
+    for date, time in taps:
+        record_attendance(conn, "TCH-1", "teacher", date, time)
+
+
+def test_refresh_is_independent_of_export_watermarks(conn):
+    _taps(conn, ("2026-03-02", "07:30:00"), ("2026-03-02", "14:30:00"))
+    assert workhours.refresh(conn) == 1
+
+    # A district-sync consumer named "workhours" must not reset payroll state
+    conn.execute("DELETE FROM export_watermarks")
+    _taps(conn, ("2026-03-03", "07:40:00"), ("2026-03-03", "13:40:00"))
+    assert workhours.refresh(conn) == 1
+    assert workhours.payroll(conn, "2026-03")[0][2:4] == (2, 13.0)
+
+
+def test_new_late_threshold_recomputes_days(conn):
+    _taps(conn, ("2026-03-02", "07:50:00"), ("2026-03-02", "14:00:00"))
+    workhours.refresh(conn)
+    assert workhours.payroll(conn, "2026-03")[0][5] == 1
+
+    workhours.refresh(conn, late_after="08:00:00")
+    assert workhours.payroll(conn, "2026-03")[0][5] == 0
+
+
+def test_rebuild_with_no_taps_commits(conn):
+    workhours.refresh(conn, rebuild=True)
+    assert not conn.in_transaction
+
+
+def test_is_current_until_a_new_tap(conn):
+    assert not workhours.is_current(conn)
+    workhours.refresh(conn)
+    assert workhours.is_current(conn)
+    _taps(conn, ("2026-03-02", "07:30:00"))
+    assert not workhours.is_current(conn)
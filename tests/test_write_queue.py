@@ -0,0 +1,53 @@
+# tests/test_write_queue.py
+
+import sqlite3
+import threading
+
+import pytest
+
+import write_queue
+
+
+@pytest.fixture
+def db(conn, monkeypatch):
+    monkeypatch.setattr(write_queue, "BACKOFF", 0)
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def test_locked_write_is_retried(db):
+    attempts = []
+
+    def insert(conn):
+        attempts.append(1)
+        conn.execute("INSERT INTO tests (test_name, test_date, full_marks) VALUES ('Unit 1', '2026-03-02', 50)")
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "done"
+
+    assert write_queue.write("insert_test", insert, db=db) == "done"
+    assert len(attempts) == 3
+    with sqlite3.connect(db) as conn:
+        # The failed attempts were rolled back
+        assert conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0] == 1
+
+
+def test_gives_up_after_retries(db):
+    def locked(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        write_queue.write("locked", locked, db=db)
+
+
+def test_timeout_is_a_busy_error_and_cancels_queued_writes(db):
+    release, ran = threading.Event(), []
+    blocker = write_queue.get_queue(db).submit("blocker", lambda conn: release.wait(5))
+
+    # Pages show any OperationalError as "the database is busy"
+    with pytest.raises(sqlite3.OperationalError, match="timed out.*cancelled"):
+        write_queue.write("queued", lambda conn: ran.append(1), db=db, timeout=0.1)
+
+    release.set()
+    blocker.result(5)
+    write_queue.write("after", lambda conn: None, db=db)
+    assert ran == []
@@ -0,0 +1,43 @@
+# trends.py
+# Attendance trend series aggregated in SQL so the chart only receives one
+# point per bucket.
+
+from terms import term_start_sql
+
+GRANULARITIES = ["day", "week", "month", "term"]
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 30, "term": 120}
+MAX_POINTS = 400
+
+BUCKET_SQL = {
+    "day": "date",
+    "week": "date(date, '-6 days', 'weekday 1')",   # Monday of that week
+    "month": "substr(date, 1, 7) || '-01'",
+    "term": term_start_sql("date"),
+}
+
+
+def fit_granularity(granularity, start, end, max_points=MAX_POINTS):
+    # Coarsen the requested bucket until the date range fits in max_points
+    span = (end - start).days + 1
+    for name in GRANULARITIES[GRANULARITIES.index(granularity):]:
+        if span / BUCKET_DAYS[name] <= max_points:
+            return name
+    return GRANULARITIES[-1]
+
+
+def attendance_trend(conn, granularity, start, end, roles=("student", "teacher")):
+    # Average daily distinct attendees per bucket, per role
+    placeholders = ", ".join("?" * len(roles))
+    return conn.execute(f"""
+        WITH daily AS (
+            SELECT date, role, COUNT(DISTINCT enrolment_no) AS present
+            FROM attendance
+            WHERE role IN ({placeholders}) AND date BETWEEN ? AND ?
+            GROUP BY role, date
+        )
+        SELECT {BUCKET_SQL[granularity]} AS period, role,
+               ROUND(AVG(present), 1) AS present, COUNT(*) AS school_days
+        FROM daily
+        GROUP BY period, role
+        ORDER BY period
+    """, (*roles, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))).fetchall()
@@ -0,0 +1,168 @@
+# workhours.py
+# Teacher working hours from attendance taps. A teacher's first tap of the day
+# is the time in and the last tap the time out. Days are materialized into
+# teacher_daily_hours and months into teacher_monthly_hours. Each refresh only
+# recomputes the teacher-days with taps above the last attendance id it saw,
+# tracked in workhours_state, so a month's payroll never rescans history.
+#
+#   python workhours.py --month 2025-03 --output payroll_2025-03.csv
+
+import argparse
+import csv
+import sqlite3
+from datetime import datetime
+
+DB = "school.db"
+LATE_AFTER = "07:45:00"   # a teacher's first tap after this time counts as late
+
+# First-in/last-out per teacher-day over the given (enrolment_no, date) pairs
+DAILY_SQL = """
+    WITH taps AS (
+        SELECT a.enrolment_no, a.date, a.time,
+               FIRST_VALUE(a.time) OVER day AS first_in,
+               LAST_VALUE(a.time) OVER day AS last_out,
+               COUNT(*) OVER day AS taps,
+               ROW_NUMBER() OVER day AS n
+        FROM attendance a
+        JOIN touched t ON t.enrolment_no = a.enrolment_no AND t.date = a.date
+        WHERE a.role = 'teacher'
+        WINDOW day AS (PARTITION BY a.enrolment_no, a.date ORDER BY a.time
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    SELECT enrolment_no, date, first_in, last_out, taps,
+           ROUND((julianday(date || ' ' || last_out) - julianday(date || ' ' || first_in)) * 24, 2),
+           first_in > ?
+    FROM taps WHERE n = 1
+"""
+
+MONTHLY_SQL = """
+    SELECT substr(date, 1, 7), enrolment_no, COUNT(*), ROUND(SUM(hours), 2), SUM(late), SUM(taps < 2)
+    FROM teacher_daily_hours
+    WHERE (substr(date, 1, 7), enrolment_no) IN (SELECT month, enrolment_no FROM touched_months)
+    GROUP BY substr(date, 1, 7), enrolment_no
+"""
+
+
+def _get_state(conn):
+    return dict(conn.execute("SELECT key, value FROM workhours_state").fetchall())
+
+
+def _set_state(conn, key, value):
+    conn.execute("""
+        INSERT INTO workhours_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, value))
+
+
+def is_current(conn, late_after=LATE_AFTER):
+    # True when refresh would have nothing to do; read-only
+    state = _get_state(conn)
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM attendance").fetchone()[0]
+    return state.get("late_after") == late_after and max_id <= int(state.get("last_id") or 0)
+
+
+def refresh(conn, late_after=LATE_AFTER, rebuild=False):
+    # Brings the daily and monthly tables up to date; returns teacher-days recomputed.
+    # Days store whether they were late, so a new threshold recomputes everything.
+    state = _get_state(conn)
+    if rebuild or state.get("late_after") != late_after:
+        conn.execute("DELETE FROM workhours_state")
+        conn.execute("DELETE FROM teacher_daily_hours")
+        conn.execute("DELETE FROM teacher_monthly_hours")
+        _set_state(conn, "late_after", late_after)
+        state = {}
+    last_id = int(state.get("last_id") or 0)
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM attendance").fetchone()[0]
+    if max_id <= last_id:
+        conn.commit()     # keep a reset even when there is nothing to recompute
+        return 0
+
+    conn.execute("DROP TABLE IF EXISTS temp.touched")
+    conn.execute("""
+        CREATE TEMP TABLE touched AS
+        SELECT DISTINCT enrolment_no, date FROM attendance
+        WHERE role='teacher' AND id > ? AND id <= ?
+    """, (last_id, max_id))
+    conn.execute("DROP TABLE IF EXISTS temp.touched_months")
+    conn.execute("""
+        CREATE TEMP TABLE touched_months AS
+        SELECT DISTINCT substr(date, 1, 7) AS month, enrolment_no FROM touched
+    """)
+
+    conn.execute("""
+        DELETE FROM teacher_daily_hours
+        WHERE (enrolment_no, date) IN (SELECT enrolment_no, date FROM touched)
+    """)
+    cursor = conn.execute(f"""
+        INSERT INTO teacher_daily_hours (enrolment_no, date, first_in, last_out, taps, hours, late)
+        {DAILY_SQL}
+    """, (late_after,))
+    days = cursor.rowcount
+
+    conn.execute("""
+        DELETE FROM teacher_monthly_hours
+        WHERE (month, enrolment_no) IN (SELECT month, enrolment_no FROM touched_months)
+    """)
+    conn.execute(f"""
+        INSERT INTO teacher_monthly_hours (month, enrolment_no, days_worked, total_hours, late_days, incomplete_days)
+        {MONTHLY_SQL}
+    """)
+
+    _set_state(conn, "last_id", str(max_id))
+    _set_state(conn, "refreshed_at", datetime.now().isoformat(timespec="seconds"))
+    conn.execute("DROP TABLE temp.touched")
+    conn.execute("DROP TABLE temp.touched_months")
+    conn.commit()
+    return days
+
+
+PAYROLL_COLUMNS = ["enrolment_id", "name", "days_worked", "total_hours", "average_hours",
+                   "late_days", "incomplete_days"]
+
+
+def payroll(conn, month):
+    # One row per teacher with taps in the month; incomplete days have a single tap
+    return conn.execute("""
+        SELECT m.enrolment_no, t.name, m.days_worked, m.total_hours,
+               ROUND(m.total_hours / m.days_worked, 2), m.late_days, m.incomplete_days
+        FROM teacher_monthly_hours m
+        LEFT JOIN teacher_details t ON t.enrolment_id = m.enrolment_no
+        WHERE m.month = ?
+        ORDER BY t.name
+    """, (month,)).fetchall()
+
+
+def daily_hours(conn, month, enrolment_no=None):
+    query = """
+        SELECT enrolment_no, date, first_in, last_out, taps, hours, late
+        FROM teacher_daily_hours
+        WHERE date BETWEEN ? || '-01' AND ? || '-31'
+    """
+    params = [month, month]
+    if enrolment_no:
+        query += " AND enrolment_no = ?"
+        params.append(enrolment_no)
+    return conn.execute(query + " ORDER BY date, enrolment_no", params).fetchall()
+
+
+def write_payroll_csv(conn, month, path):
+    rows = payroll(conn, month)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PAYROLL_COLUMNS)
+        writer.writerows(rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teacher working hours and payroll export.")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--month", default=datetime.now().strftime("%Y-%m"), help="YYYY-MM (default: this month)")
+    parser.add_argument("--output", help="Write the month's payroll CSV here")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every day from scratch")
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.db) as conn:
+        print(f"Recomputed {refresh(conn, rebuild=args.rebuild)} teacher-days")
+        if args.output:
+            print(f"Wrote {write_payroll_csv(conn, args.month, args.output)} teachers to {args.output}")
@@ -0,0 +1,109 @@
+# write_queue.py
+# Single writer thread for page writes. Every Streamlit session submits its
+# inserts and updates here instead of opening its own write connection, so
+# writes from several admins and the kiosk are applied one at a time on one
+# connection. A write that still meets "database is locked" (from the gate
+# or a CLI job) is retried with backoff; the caller gets the function's
+# return value or its exception.
+#
+# Deliberately outside the queue: the gate writer (its own batching thread,
+# usually another process), maintenance (VACUUM and checkpoints cannot run in
+# a transaction), init_db at startup, and the command-line tools, which run
+# as separate processes and rely on SQLite's own locking.
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import perf
+
+DB = "school.db"
+RETRIES = 5               # attempts per write before giving up
+BACKOFF = 0.05            # seconds before the first retry, doubled each time
+BUSY_TIMEOUT = 2          # seconds SQLite itself waits on a lock per attempt
+WAIT_TIMEOUT = 30         # seconds a caller waits for its result
+
+logger = logging.getLogger("school.write_queue")
+
+Job = namedtuple("Job", "name fn args future submitted")
+
+
+def is_busy(error):
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+class WriteQueue:
+    def __init__(self, db=DB):
+        self.db = db
+        self.jobs = queue.Queue()
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="write-queue", daemon=True)
+                self.thread.start()
+
+    def submit(self, name, fn, *args):
+        # fn(conn, *args) runs in one transaction on the writer connection
+        self._ensure_started()
+        future = Future()
+        self.jobs.put(Job(name, fn, args, future, time.perf_counter()))
+        return future
+
+    def _execute(self, conn, job):
+        for attempt in range(RETRIES):
+            try:
+                with conn:
+                    return job.fn(conn, *job.args)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt == RETRIES - 1:
+                    raise
+                logger.warning("%s: %s, retry %d", job.name, e, attempt + 1)
+                time.sleep(BACKOFF * 2 ** attempt)
+
+    def run(self):
+        conn = sqlite3.connect(self.db, timeout=BUSY_TIMEOUT)
+        try:
+            while True:
+                job = self.jobs.get()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    job.future.set_result(self._execute(conn, job))
+                except Exception as e:
+                    job.future.set_exception(e)
+                finally:
+                    perf.record(f"write:{job.name}", time.perf_counter() - job.submitted)
+        finally:
+            conn.close()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(db=DB):
+    with _queues_lock:
+        if db not in _queues:
+            _queues[db] = WriteQueue(db)
+        return _queues[db]
+
+
+def write(name, fn, *args, db=DB, timeout=WAIT_TIMEOUT):
+    # Blocking helper for pages: queue the write and wait for its result. A
+    # write that has not finished in time is cancelled if it has not started
+    # and reported as OperationalError, which pages already show as "busy".
+    future = get_queue(db).submit(name, fn, *args)
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        state = "cancelled" if future.cancel() else "still running"
+        logger.warning("%s: no result after %ss, %s", name, timeout, state)
+        raise sqlite3.OperationalError(f"write queue timed out after {timeout}s ({state})") from None